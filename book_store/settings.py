@@ -53,14 +53,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'books.middleware.RequestMetricsMiddleware',  # 🔹 First, so its timings cover everything below
+    'books.middleware.PrimaryPinMiddleware',  # 🔹 Only with read replicas configured
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'books.middleware.ProfilingMiddleware',  # 🔹 Needs request.user for the staff-only ?profile=1
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'books.middleware.StaticFilesMiddleware',  # 🔹 WhiteNoise, async-capable so the ASGI stack stays async
+    'books.middleware.CartCookieMiddleware',
 ]
 
 CSRF_TRUSTED_ORIGINS = [
@@ -121,20 +125,127 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("🚨 DATABASE_URL is not set! Make sure it's configured in Railway.")
 
+# Connection management (books/db_pool.py)
+# DB_CONN_MODE: close (default, a new connection per request) | persistent | pool
+# DB_CONN_MAX_AGE: seconds a persistent connection is kept, pinged before each request's first query
+# DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT: connections per process, and seconds to wait for a free one
+# DB_POOL_MAX_IDLE: seconds an unused pooled connection is kept
+DB_CONN_MODE = os.getenv("DB_CONN_MODE", "close")
+if DB_CONN_MODE == "persistent" and os.getenv("SERVER_MODE", "wsgi") == "asgi":
+    # 🔹 Async views run their queries on throwaway threads, each keeping its own connection open
+    raise RuntimeError("🚨 DB_CONN_MODE=persistent doesn't suit SERVER_MODE=asgi: use DB_CONN_MODE=pool.")
+POOLED_ENGINES = {
+    'django.db.backends.postgresql': 'books.db_backends.postgresql',
+    'django.db.backends.sqlite3': 'books.db_backends.sqlite3',
+}
+
+
+def database_from_url(url):
+    database = dj_database_url.parse(
+        url,
+        conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", 600)) if DB_CONN_MODE == "persistent" else 0,
+        conn_health_checks=DB_CONN_MODE == "persistent",
+    )
+    if DB_CONN_MODE == "pool":
+        # 🔹 CONN_MAX_AGE stays 0: the end of each request hands the connection back to the pool
+        if database['ENGINE'] not in POOLED_ENGINES:
+            raise RuntimeError(f"🚨 DB_CONN_MODE=pool supports PostgreSQL and SQLite, not {database['ENGINE']}")
+        database['ENGINE'] = POOLED_ENGINES[database['ENGINE']]
+        database['POOL'] = {
+            'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            'timeout': float(os.getenv("DB_POOL_TIMEOUT", 5)),
+            'max_idle': float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+        }
+    return database
+
+
 DATABASES = {
-    'default': dj_database_url.config(default=DATABASE_URL)
+    'default': database_from_url(DATABASE_URL)
 }
 
+# Read replicas (books/db_router.py)
+# DATABASE_REPLICA_URLS: comma-separated replica URLs; book, category and review reads are spread over them
+# DB_PRIMARY_PIN_SECONDS: after a client writes one of those, its reads stay on the primary this long
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_DATABASES = []
+for index, url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f'replica{index}'] = dict(database_from_url(url), TEST={'MIRROR': 'default'})
+    REPLICA_DATABASES.append(f'replica{index}')
+DB_PRIMARY_PIN_SECONDS = int(os.getenv("DB_PRIMARY_PIN_SECONDS", 5))
+DATABASE_ROUTERS = ['books.db_router.ReplicaRouter']
+
+# Cache, session and cart storage
+# SESSION_BACKEND: db (default) | cached_db | cache | signed_cookies | file
+# CACHE_BACKEND: locmem (default) | file (local stand-in for Redis) | redis (needs the `redis` package)
+# CART_STORAGE: session (default) | cookie (signed cookie for anonymous users)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'book-snoop',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv("CACHE_LOCATION", os.path.join(BASE_DIR, '.cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+# 🔹 Catalog cache versions and ETags live in the cache: worker processes must share it
+if CACHE_BACKEND == "locmem" and int(os.getenv("WEB_CONCURRENCY", 1)) > 1:
+    raise RuntimeError("🚨 WEB_CONCURRENCY > 1 needs a shared cache: set CACHE_BACKEND=file or redis.")
+
+# Seconds a cached catalog page/payload may live (versions invalidate it sooner, see books/catalog_cache.py)
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 600))
+# Cache-Control max-age for catalog responses that support conditional GET (books/conditional.py)
+CATALOG_HTTP_MAX_AGE = int(os.getenv("CATALOG_HTTP_MAX_AGE", 60))
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "db")
+SESSION_ENGINE = f"django.contrib.sessions.backends.{SESSION_BACKEND}"
+
+CART_STORAGE = os.getenv("CART_STORAGE", "session")
+
+# Request metrics (books/middleware.py, served at /metrics)
+# METRICS_TOKEN: bearer token for scrapers; without it /metrics is staff-only
+# METRICS_SLOW_QUERY_MS: log queries slower than this, for METRICS_SLOW_QUERY_SAMPLE_RATE of requests
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "true").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_SLOW_QUERY_MS = float(os.environ["METRICS_SLOW_QUERY_MS"]) if os.getenv("METRICS_SLOW_QUERY_MS") else None
+METRICS_SLOW_QUERY_SAMPLE_RATE = float(os.getenv("METRICS_SLOW_QUERY_SAMPLE_RATE", 0.1))
+
+# On-demand profiling (books/profiling.py, listed at /profiles/ for staff)
+# PROFILING_SAMPLE_RATE: fraction of all requests to profile (0 = only on request)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(BASE_DIR, '.profiles'))
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", 50))
+PROFILING_TOKEN_MAX_AGE = int(os.getenv("PROFILING_TOKEN_MAX_AGE", 3600))
+
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 
 
+# API tokens (books/authentication.py, issued by POST /api/auth/login/)
+# API_TOKEN_MAX_AGE: seconds a token stays valid (0 = until logout or password change)
+# API_TOKEN_CACHE_SIZE / API_TOKEN_CACHE_TTL: verified tokens kept per process, and for how long
+# API_BASIC_AUTH: keep HTTP Basic for old clients; it runs the password hasher on every request
+API_TOKEN_MAX_AGE = int(os.getenv("API_TOKEN_MAX_AGE", 60 * 60 * 24 * 30))
+API_TOKEN_CACHE_SIZE = int(os.getenv("API_TOKEN_CACHE_SIZE", 10000))
+API_TOKEN_CACHE_TTL = int(os.getenv("API_TOKEN_CACHE_TTL", 60))
+API_BASIC_AUTH = os.getenv("API_BASIC_AUTH", "true").lower() == "true"
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-    ],
+        'rest_framework.authentication.SessionAuthentication',  # 🔹 First: anonymous API calls stay 403, not 401
+        'books.authentication.TokenAuthentication',
+    ] + (['rest_framework.authentication.BasicAuthentication'] if API_BASIC_AUTH else []),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny'
     ],
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class BooksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'books'
+
+    def ready(self):
+        from . import metrics, signals  # noqa: F401 (registers receivers)
+
+        metrics.register_collector(metrics.app_counters)
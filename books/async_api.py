@@ -0,0 +1,133 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import permissions
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from books.catalog_cache import aget_or_build
+from books.conditional import item_etag, list_validators, with_cache_control
+
+# Async front for the catalog API's list and retrieve routes.
+#
+# DRF views are sync only, so under ASGI every API call would run in a
+# worker thread. For anonymous JSON reads of the book and category
+# collections this front does what ConditionalGetMixin and
+# CatalogCacheMixin do, on the event loop: a 304 from the catalog versions
+# or the book's `updated_at`, else the cached payload, else the payload
+# built through the async ORM and cached under the same key the sync view
+# uses. Anything else (writes, credentials, the browsable API, payloads
+# only a serializer can build) goes to the regular DRF view unchanged.
+
+ROUTES = {
+    "list": ({"get": "list", "post": "create"}, {"suffix": "List", "detail": False}),
+    "detail": (
+        {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"},
+        {"suffix": "Instance", "detail": True},
+    ),
+}
+
+
+def _initialize(viewset, actions, initkwargs, request, args, kwargs):
+    """A viewset instance set up the way DRF's `as_view()` would, minus authentication"""
+    view = viewset(**initkwargs)
+    view.action_map = dict(actions, head=actions["get"])
+    for method, action in view.action_map.items():
+        setattr(view, method, getattr(view, action))
+    view.action = actions["get"]
+    view.args, view.kwargs, view.format_kwarg = args, kwargs, None
+    view.request = Request(request, parsers=view.get_parsers(), negotiator=view.get_content_negotiator())
+    view.headers = view.default_response_headers
+    return view
+
+
+def _render(view, data):
+    renderer, media_type = view.request.accepted_renderer, view.request.accepted_media_type
+    response = HttpResponse(renderer.render(data, media_type, {}), content_type=renderer.media_type)
+    headers = dict(view.headers)
+    vary = headers.pop("Vary", None)
+    for name, value in headers.items():
+        response[name] = value
+    if vary:
+        patch_vary_headers(response, [vary])
+    return response
+
+
+async def _respond(view, etag, last_modified, scopes, build):
+    """304 if the client's copy is current, else the cached or freshly built payload; None to fall back"""
+    etag, timestamp = quote_etag(etag), int(last_modified.timestamp())
+    response = get_conditional_response(view.request._request, etag=etag, last_modified=timestamp)
+    if response is None:
+        data = await aget_or_build("api", view.request.build_absolute_uri(), scopes, build)
+        if data is None:
+            return None
+        response = _render(view, data)
+    # 🔹 The same headers `condition()` and ConditionalGetMixin add
+    response.headers.setdefault("ETag", etag)
+    response.headers.setdefault("Last-Modified", http_date(timestamp))
+    return with_cache_control(response)
+
+
+async def _list(view):
+    request = view.request
+    etag, last_modified = await sync_to_async(list_validators)(
+        view.conditional_scope, request.get_full_path(), request.accepted_media_type
+    )
+    return await _respond(view, etag, last_modified, [view.cache_scope], view.alist_data)
+
+
+async def _retrieve(view):
+    request = view.request
+    lookup_value = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+    item = view.get_queryset().filter(**{view.lookup_field: lookup_value})
+    updated_at = await item.values_list("updated_at", flat=True).afirst()
+    if updated_at is None:
+        return None  # 🔹 DRF builds the 404
+
+    async def build():
+        instance = await item.afirst()
+        if instance is None:
+            return None
+        return view.get_serializer(instance).data  # 🔹 Plain columns only: no lazy queries
+
+    etag = item_etag(updated_at, request.get_full_path(), request.accepted_media_type)
+    return await _respond(view, etag, updated_at, [view.cache_item_scope(lookup_value)], build)
+
+
+def async_catalog_view(viewset, basename, route):
+    """
+    An async view for a catalog viewset's `route` ("list" or "detail") that
+    serves anonymous JSON reads itself and hands every other request to the
+    viewset's regular DRF view.
+    """
+    actions, route_kwargs = ROUTES[route]
+    initkwargs = dict(route_kwargs, basename=basename)
+    sync_view = sync_to_async(viewset.as_view(actions, **initkwargs))
+    serve = _list if route == "list" else _retrieve
+
+    async def _serve(request, args, kwargs):
+        view = _initialize(viewset, actions, initkwargs, request, args, kwargs)
+        try:
+            if not all(isinstance(permission, permissions.AllowAny) for permission in view.get_permissions()):
+                return None
+            view.request.accepted_renderer, view.request.accepted_media_type = view.perform_content_negotiation(view.request)
+        except APIException:
+            return None
+        if not isinstance(view.request.accepted_renderer, JSONRenderer):
+            return None  # 🔹 The browsable API renders templates with the session user: sync only
+        try:
+            return await serve(view)
+        except APIException:
+            return None  # 🔹 Bad ?fields=, bad cursor...: the sync view builds the error response
+
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD") and "HTTP_AUTHORIZATION" not in request.META:
+            response = await _serve(request, args, kwargs)
+            if response is not None:
+                return response
+        return await sync_view(request, *args, **kwargs)
+
+    view.csrf_exempt = True  # 🔹 Like DRF's views; SessionAuthentication enforces CSRF for writes
+    return view
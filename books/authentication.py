@@ -0,0 +1,174 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+
+from books.models import ApiToken, User
+
+# Token authentication for API clients.
+#
+# HTTP Basic runs the password hasher (PBKDF2, hundreds of milliseconds of
+# CPU by design) on every request. A token is a random 256-bit key handed out
+# once by the API login: it is stored as a SHA-256 digest, which is safe for
+# a key that can't be guessed and costs microseconds to compute. Verified
+# tokens are kept in a bounded in-process LRU, so a busy client costs neither
+# a hash nor a query per request.
+#
+# Entries hold the token's and user's column values, not model instances:
+# each request gets its own fresh `User`, so nothing one request does to it
+# (or caches on it, like permissions) leaks into another. Revocation (logout,
+# password change, deleting the token) and any other save of the user (a
+# demotion from staff, say) evict the entry in this process at once. Other
+# processes, and queryset `update()`s, which send no signals, leave it for at
+# most API_TOKEN_CACHE_TTL seconds.
+
+KEYWORD = "Token"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "rejected": 0}
+
+
+def token_cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_token_cache_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _row(instance):
+    return instance._state.db, tuple(getattr(instance, field.attname) for field in instance._meta.concrete_fields)
+
+
+def _from_row(model, row):
+    db, values = row
+    return model.from_db(db, [field.attname for field in model._meta.concrete_fields], values)
+
+
+class VerifiedTokenCache:
+    """Thread-safe LRU of `digest -> (user_id, token row, user row, cached_until)`; hands out fresh instances"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, digest):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            _, token_row, user_row, cached_until = entry
+            if cached_until < now:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+        token = _from_row(ApiToken, token_row)
+        token.user = _from_row(User, user_row)
+        return token
+
+    def put(self, digest, token):
+        max_size = getattr(settings, "API_TOKEN_CACHE_SIZE", 10_000)
+        if max_size <= 0:
+            return
+        cached_until = time.monotonic() + getattr(settings, "API_TOKEN_CACHE_TTL", 60)
+        entry = (token.user_id, _row(token), _row(token.user), cached_until)
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for digest in [digest for digest, entry in self._entries.items() if entry[0] == user_id]:
+                del self._entries[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache()
+
+
+def issue_token(user):
+    """Create a token for `user` and return its key; the key can't be recovered later"""
+    now = timezone.now()
+    max_age = getattr(settings, "API_TOKEN_MAX_AGE", 0)
+    # 🔹 Every login issues a token, so drop this user's dead ones while we're here
+    ApiToken.objects.filter(user=user, expires_at__lte=now).delete()
+    key = secrets.token_urlsafe(32)
+    ApiToken.objects.create(
+        user=user,
+        digest=token_digest(key),
+        expires_at=now + timedelta(seconds=max_age) if max_age else None,
+    )
+    return key
+
+
+def revoke_tokens(user):
+    """Delete every token of `user` (password change, deactivation)"""
+    ApiToken.objects.filter(user=user).delete()
+    token_cache.discard_user(user.pk)
+
+
+def _usable(token):
+    return token.user.is_active and (token.expires_at is None or token.expires_at > timezone.now())
+
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """`Authorization: Token <key>`, verified through `token_cache`"""
+
+    def authenticate(self, request):
+        parts = authentication.get_authorization_header(request).split()
+        if not parts or parts[0].lower() != KEYWORD.lower().encode():
+            return None  # 🔹 Not ours: let session/basic auth have a go
+        if len(parts) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        try:
+            digest = token_digest(parts[1].decode())
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        token = token_cache.get(digest)
+        if token is not None and _usable(token):
+            _count("hits")
+            return token.user, token
+
+        token = ApiToken.objects.select_related("user").filter(digest=digest).first()
+        if token is None or not _usable(token):
+            _count("rejected")
+            token_cache.discard(digest)
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        _count("misses")
+        token_cache.put(digest, token)
+        return token.user, token
+
+    def authenticate_header(self, request):
+        return KEYWORD
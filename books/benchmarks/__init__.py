@@ -0,0 +1,4 @@
+"""
+Self-contained performance harnesses. Each module exposes a plain function
+returning a JSON-friendly dict, wrapped by a `bench_*` management command.
+"""
@@ -0,0 +1,38 @@
+from django.test.utils import override_settings
+
+from books.benchmarks.load import run_load_test, run_metadata, simulated_db_latency
+
+# 🔹 The read paths that have async views; checkout and cart stay sync
+READ_MIX = {"browse": 30, "detail": 40, "api_list": 30}
+
+
+def run_server_comparison(concurrency_levels=(4, 16, 64), duration=5.0, workers=None, db_latency_ms=50,
+                          mix=None, cache=False, seed=0):
+    """
+    Load-test the catalog reads under WSGI and ASGI at each concurrency
+    level, with `db_latency_ms` added to every query. The WSGI server
+    handles as many requests at once as the level (gunicorn `gthread`
+    style), the same as ASGI, unless `workers` caps it (sync workers).
+    The catalog cache is off by default so each request really waits on
+    the database.
+    """
+    overrides = {} if cache else {"CACHES": {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}}
+    results = []
+    with override_settings(**overrides), simulated_db_latency(db_latency_ms):
+        for concurrency in concurrency_levels:
+            for server in ("wsgi", "asgi"):
+                run = run_load_test(
+                    concurrency=concurrency, duration=duration, mix=mix or READ_MIX,
+                    server=server, seed=seed, workers=workers or concurrency,
+                )
+                results.append({
+                    "server": server,
+                    "workers": run["workers"],
+                    "concurrency": concurrency,
+                    "throughput_rps": run["throughput_rps"],
+                    "p50_ms": run["overall"]["p50_ms"] if run["overall"] else None,
+                    "p95_ms": run["overall"]["p95_ms"] if run["overall"] else None,
+                    "errors": run["overall"]["errors"] if run["overall"] else None,
+                    "db_queries_per_request": run["db_queries_per_request"],
+                })
+    return {"meta": run_metadata(seed), "db_latency_ms": db_latency_ms, "catalog_cache": cache, "runs": results}
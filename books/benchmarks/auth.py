@@ -0,0 +1,62 @@
+import base64
+import statistics
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from books.authentication import issue_token, token_cache
+from books.models import User
+
+BENCH_USERNAME = "bench-auth-user"
+BENCH_PASSWORD = "bench-auth-pass-123"
+SCHEMES = ["basic", "token_uncached", "token"]
+
+
+def _headers(scheme, key):
+    if scheme == "basic":
+        credentials = base64.b64encode(f"{BENCH_USERNAME}:{BENCH_PASSWORD}".encode()).decode()
+        return {"HTTP_AUTHORIZATION": f"Basic {credentials}"}
+    return {"HTTP_AUTHORIZATION": f"Token {key}"}
+
+
+def run_auth_benchmark(rounds=30, schemes=None, path="/api/orders/"):
+    """
+    Time an authenticated API GET with HTTP Basic (password hasher every
+    request), a token with the verified-token cache off (one query), and a
+    cached token. Uses whatever PASSWORD_HASHERS the settings give.
+    """
+    user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+    user.set_password(BENCH_PASSWORD)
+    user.save()  # 🔹 Revokes earlier benchmark tokens
+    key = issue_token(user)
+    client = Client()
+    results = []
+    try:
+        for scheme in schemes or SCHEMES:
+            headers = _headers(scheme, key)
+            token_cache.clear()
+            with override_settings(**({"API_TOKEN_CACHE_SIZE": 0} if scheme == "token_uncached" else {})):
+                assert client.get(path, **headers).status_code == 200  # 🔹 Warm-up, and fills the token cache
+                latencies, queries = [], 0
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    with CaptureQueriesContext(connection) as ctx:
+                        request_started = time.perf_counter()
+                        client.get(path, **headers)
+                        latencies.append((time.perf_counter() - request_started) * 1000)
+                    queries += len(ctx.captured_queries)
+                elapsed = time.perf_counter() - started
+            latencies.sort()
+            results.append({
+                "scheme": scheme,
+                "requests": rounds,
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+                "throughput_rps": round(rounds / elapsed, 2),
+                "db_queries_per_request": round(queries / rounds, 2),
+            })
+    finally:
+        user.delete()
+    return results
@@ -0,0 +1,120 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+
+from books.db_pool import close_pools, pool_stats
+
+# Connection-management comparison: worker threads replay request cycles
+# (Django's request-start housekeeping, one small query, the request-end
+# housekeeping) against the configured database under each DB_CONN_MODE.
+# Opening a connection costs a few milliseconds on a networked PostgreSQL
+# (TCP, TLS, authentication, backend fork); `connect_latency_ms` adds that
+# to every new connection so a local SQLite file shows the same shape.
+
+MODES = ["close", "persistent", "pool"]
+QUERY = "SELECT COUNT(*) FROM django_migrations"
+
+
+class _SlowConnect:
+    connect_latency = 0.0
+
+    def get_new_connection(self, conn_params):
+        time.sleep(self.connect_latency)
+        return super().get_new_connection(conn_params)
+
+
+def _plain_engine(engine):
+    return {pooled: plain for plain, pooled in settings.POOLED_ENGINES.items()}.get(engine, engine)
+
+
+def _database(mode, base, pool_size):
+    database = dict(base, ENGINE=_plain_engine(base["ENGINE"]), CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+    database.pop("POOL", None)
+    if mode == "persistent":
+        database.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+    elif mode == "pool":
+        database.update(ENGINE=settings.POOLED_ENGINES[database["ENGINE"]], POOL={"max_size": pool_size, "timeout": 30})
+    return database
+
+
+def _wrapper_class(database, connect_latency):
+    backend = load_backend(database["ENGINE"]).DatabaseWrapper
+    plain = load_backend(_plain_engine(database["ENGINE"])).DatabaseWrapper
+    bases = (_SlowConnect, plain) if backend is plain else (backend, _SlowConnect, plain)
+    return type("BenchDatabaseWrapper", bases, {"connect_latency": connect_latency / 1000})
+
+
+def _request_cycle(wrapper):
+    wrapper.close_if_unusable_or_obsolete()  # 🔹 What request_started does
+    with wrapper.cursor() as cursor:
+        cursor.execute(QUERY)
+        cursor.fetchone()
+    wrapper.close_if_unusable_or_obsolete()  # 🔹 ...and request_finished
+
+
+def run_connection_benchmark(requests=400, threads=8, modes=None, pool_size=4, connect_latency_ms=5, database=None):
+    """
+    Per-request latency and connections opened for each connection mode.
+    `database` is a DATABASES entry (default: the `default` database); it must
+    be a server or a file, not SQLite's in-memory test database.
+    """
+    base = database or connections["default"].settings_dict
+    results = []
+    for mode in modes or MODES:
+        alias = f"bench-{mode}"
+        settings_dict = _database(mode, base, pool_size)
+        wrapper_class = _wrapper_class(settings_dict, connect_latency_ms)
+        opened, latencies, lock = [0], [], threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    opened[0] += 1
+
+        def worker(count):
+            wrapper = wrapper_class(dict(settings_dict), alias)
+            timings = []
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    _request_cycle(wrapper)
+                    timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                wrapper.close()
+            with lock:
+                latencies.extend(timings)
+
+        connection_created.connect(count_connection, weak=False)
+        try:
+            started = time.perf_counter()
+            workers = [threading.Thread(target=worker, args=(requests // threads,)) for _ in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            stats = pool_stats().get(alias)
+        finally:
+            connection_created.disconnect(count_connection)
+            close_pools(alias)
+
+        latencies.sort()
+        result = {
+            "mode": mode,
+            "requests": len(latencies),
+            "threads": threads,
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            # 🔹 A pooled checkout fires connection_created too: count what the pool really opened
+            "connections_opened": stats["created"] if stats else opened[0],
+        }
+        if stats:
+            result.update(pool_size=pool_size, pool_waits=stats["waits"], pool_wait_ms=round(stats["wait_seconds"] * 1000, 3))
+        results.append(result)
+    return results
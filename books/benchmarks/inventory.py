@@ -0,0 +1,94 @@
+import threading
+import time
+
+from django.db import connection, transaction
+
+from books.inventory import OutOfStockError, decrement_stock
+from books.models import Book
+
+
+def _legacy_take(book_id, quantity):
+    """The old OrderItem.save path: read, subtract in Python, save every column"""
+    book = Book.objects.get(id=book_id)
+    if book.stock < quantity:
+        raise OutOfStockError([])
+    book.stock -= quantity
+    book.save()
+
+
+def _locked_take(book_id, quantity):
+    """Correct but serialized: SELECT ... FOR UPDATE, then save the row"""
+    with transaction.atomic():
+        book = Book.objects.select_for_update().get(id=book_id)
+        if book.stock < quantity:
+            raise OutOfStockError([])
+        book.stock -= quantity
+        book.save(update_fields=["stock"])
+
+
+def _conditional_take(book_id, quantity):
+    decrement_stock({book_id: quantity})
+
+
+STRATEGIES = {
+    "legacy": _legacy_take,
+    "locked": _locked_take,
+    "conditional": _conditional_take,
+}
+
+
+def run_inventory_stress(book_id, strategy="conditional", workers=8, attempts=50, quantity=1):
+    """
+    Hammer one book's stock from `workers` threads and report what happened.
+
+    `lost_updates` is how many successful takes the stock column does not
+    reflect; anything above zero means the strategy oversold.
+    """
+    take = STRATEGIES[strategy]
+    initial = Book.objects.values_list("stock", flat=True).get(id=book_id)
+    counts = {"sold": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+
+    def worker():
+        sold = rejected = errors = 0
+        try:
+            barrier.wait()
+            for _ in range(attempts):
+                try:
+                    take(book_id, quantity)
+                    sold += 1
+                except OutOfStockError:
+                    rejected += 1
+                except Exception:
+                    errors += 1  # 🔹 e.g. SQLite "database is locked" under contention
+        finally:
+            with lock:
+                counts["sold"] += sold
+                counts["rejected"] += rejected
+                counts["errors"] += errors
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    final = Book.objects.values_list("stock", flat=True).get(id=book_id)
+    attempted = workers * attempts
+    completed = counts["sold"] + counts["rejected"]
+    return {
+        "strategy": strategy,
+        "vendor": connection.vendor,
+        "workers": workers,
+        "attempts": attempted,
+        "initial_stock": initial,
+        "final_stock": final,
+        **counts,
+        "lost_updates": counts["sold"] * quantity - (initial - final),
+        "elapsed_s": round(elapsed, 4),
+        "checkouts_per_s": round(completed / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,371 @@
+import http.cookiejar
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from books import metrics
+from books.models import Book, User
+from books.seeding import TITLE_WORDS, seed_catalog
+
+# End-to-end load test: an in-process HTTP server (threaded WSGI, or uvicorn
+# for ASGI) and a pool of virtual users replaying weighted sessions against
+# it over real sockets. Server-side query counts come from the request
+# metrics middleware (books/middleware.py).
+
+LOAD_USER_PREFIX = "load-user-"
+LOAD_USER_PASSWORD = "load-pass-123"
+SEARCH_TERMS = TITLE_WORDS
+
+CHECKOUT_FORM = {
+    "full_name": "Load Tester", "address": "1 Bench Street", "city": "Testville",
+    "zip_code": "12345", "country": "Nowhere",
+}
+
+# 🔹 Relative frequency of each session kind
+DEFAULT_MIX = {"browse": 30, "search": 20, "detail": 25, "add_to_cart": 10, "checkout": 5, "api_list": 10}
+
+
+def _browse(user):
+    user.get("browse.home", "/")
+    user.get("browse.list", "/books/")
+    user.get("browse.list_by_rating", "/books/?sort=rating")
+
+
+def _search(user):
+    user.get("search.html", "/books/?" + urllib.parse.urlencode({"q": user.rng.choice(SEARCH_TERMS)}))
+    user.get("search.api", "/api/books/search/?" + urllib.parse.urlencode({"q": user.rng.choice(SEARCH_TERMS)}))
+
+
+def _detail(user):
+    book_id = user.pick_book()
+    user.get("detail.page", f"/books/{book_id}/")
+    user.get("detail.reviews", f"/books/{book_id}/reviews/")
+
+
+def _add_to_cart(user):
+    user.get("cart.add", f"/cart/add/{user.pick_book()}/")
+    user.get("cart.view", "/cart/")
+
+
+def _checkout(user):
+    if not user.logged_in:
+        user.post("checkout.login", "/login/", {"username": user.username, "password": LOAD_USER_PASSWORD})
+        user.logged_in = True
+    user.get("checkout.add", f"/cart/add/{user.pick_book()}/")
+    user.post("checkout.submit", "/checkout/", CHECKOUT_FORM)
+
+
+def _api_list(user):
+    user.get("api.books", "/api/books/")
+    user.get("api.categories", "/api/categories/")
+
+
+SESSIONS = {
+    "browse": _browse,
+    "search": _search,
+    "detail": _detail,
+    "add_to_cart": _add_to_cart,
+    "checkout": _checkout,
+    "api_list": _api_list,
+}
+
+
+class VirtualUser:
+    """One simulated visitor with its own cookie jar and RNG"""
+
+    def __init__(self, base_url, index, seed, book_ids, record):
+        self.base_url = base_url
+        self.username = f"{LOAD_USER_PREFIX}{index}"
+        self.rng = random.Random(seed * 7919 + index)
+        self.book_ids = book_ids
+        self.record = record
+        self.logged_in = False
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def pick_book(self):
+        return self.rng.choice(self.book_ids)
+
+    def _request(self, step, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        started = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        except OSError:
+            status = 0
+        self.record(step, (time.perf_counter() - started) * 1000, status)
+
+    def get(self, step, path):
+        self._request(step, path)
+
+    def post(self, step, path, data):
+        self._request(step, path, data)
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _PooledWSGIServer(WSGIServer):
+    """Handles at most `workers` requests at once, like that many sync gunicorn workers"""
+
+    def __init__(self, *args, workers, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _WSGIServerThread:
+    def __init__(self, workers=None):
+        from django.core.wsgi import get_wsgi_application
+
+        server_class = partial(_PooledWSGIServer, workers=workers) if workers else _ThreadingWSGIServer
+        self.server = make_server(
+            "127.0.0.1", 0, get_wsgi_application(), server_class=server_class, handler_class=_QuietHandler,
+        )
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _ASGIServerThread:
+    def __init__(self, workers=None):
+        try:
+            import uvicorn
+        except ImportError:
+            raise ImproperlyConfigured("ASGI load tests need uvicorn (pip install uvicorn)")
+        from django.core.asgi import get_asgi_application
+
+        self.socket = socket.socket()
+        self.socket.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}"
+        config = uvicorn.Config(get_asgi_application(), log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, kwargs={"sockets": [self.socket]}, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
+        self.socket.close()
+
+
+SERVERS = {"wsgi": _WSGIServerThread, "asgi": _ASGIServerThread}
+
+
+@contextmanager
+def simulated_db_latency(milliseconds):
+    """Add `milliseconds` of blocking wait to every query, as a database across the network would"""
+    delay = milliseconds / 1000
+
+    def slow_execute(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    def wrap(sender, connection, **kwargs):
+        connection.execute_wrappers.append(slow_execute)
+
+    # 🔹 Server threads open their own connections, so hook every new one
+    connection_created.connect(wrap, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(wrap)
+
+
+def seed_load_data(books=200, users=20, seed=0):
+    """
+    Top the catalog up to `books` books and create the virtual users' accounts.
+    Deterministic for a given `seed`; existing rows are reused.
+    """
+    missing = books - Book.objects.count()
+    if missing > 0:
+        seed_catalog(categories=10, books=missing, users=0, reviews=0, orders=0, seed=seed)
+    password = make_password(LOAD_USER_PASSWORD)  # 🔹 Hash once; PBKDF2 per user would dominate seeding
+    User.objects.bulk_create(
+        [User(username=f"{LOAD_USER_PREFIX}{i}", password=password) for i in range(users)],
+        ignore_conflicts=True,
+    )
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _summary(latencies, errors):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "p50_ms": round(_percentile(ordered, 0.50), 3),
+        "p95_ms": round(_percentile(ordered, 0.95), 3),
+        "p99_ms": round(_percentile(ordered, 0.99), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def _query_counts(before, after):
+    """Per-view `(requests, queries)` recorded by the metrics middleware during the run"""
+    counts = {}
+    for (metric, labels), (count, total) in after.items():
+        if metric == "db_queries":
+            old_count, old_total = before.get((metric, labels), (0, 0))
+            if count > old_count:
+                counts[dict(labels)["view"]] = (count - old_count, total - old_total)
+    return counts
+
+
+def _git(*args):
+    try:
+        result = subprocess.run(["git", *args], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def run_metadata(seed):
+    """What a run was measured against, so results from different commits and settings can be compared"""
+    # 🔹 GIT_REVISION for deployed images, which ship without .git
+    revision = os.getenv("GIT_REVISION") or _git("rev-parse", "HEAD")
+    changes = _git("status", "--porcelain", "--untracked-files=no") if revision and not os.getenv("GIT_REVISION") else None
+    return {
+        "revision": revision,
+        "dirty": bool(changes) if changes is not None else None,
+        "seed": seed,
+        "books": Book.objects.count(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "settings": {
+            "database": connection.vendor,
+            "DB_CONN_MODE": getattr(settings, "DB_CONN_MODE", None),
+            "replicas": len(getattr(settings, "REPLICA_DATABASES", [])),
+            "CACHE_BACKEND": getattr(settings, "CACHE_BACKEND", None),
+            "SESSION_BACKEND": getattr(settings, "SESSION_BACKEND", None),
+            "CART_STORAGE": getattr(settings, "CART_STORAGE", None),
+            "METRICS_ENABLED": getattr(settings, "METRICS_ENABLED", None),
+            "DEBUG": settings.DEBUG,
+        },
+    }
+
+
+def run_load_test(concurrency=8, duration=10.0, sessions=None, mix=None, server="wsgi", seed=0, workers=None):
+    """
+    Serve the app in-process and let `concurrency` virtual users replay
+    sessions drawn from `mix` (see `DEFAULT_MIX`) until `duration` seconds
+    have passed, or until each has completed `sessions` sessions. `workers`
+    caps the WSGI server's concurrent requests (default: a thread each).
+
+    Returns latency percentiles overall and per step, throughput, the
+    server-side queries per request, and the revision and settings measured
+    (`meta`). Needs `seed_load_data()` to have run.
+    """
+    mix = mix or DEFAULT_MIX
+    book_ids = list(Book.objects.order_by("id").values_list("id", flat=True)[:1000])
+    if not book_ids:
+        raise ImproperlyConfigured("No books to load-test against; seed some first")
+
+    lock = threading.Lock()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+
+    def record(step, elapsed_ms, status):
+        with lock:
+            latencies[step].append(elapsed_ms)
+            if not 200 <= status < 400:
+                errors[step] += 1
+
+    with SERVERS[server](workers) as running:
+        deadline = time.perf_counter() + duration
+
+        def worker(index):
+            user = VirtualUser(running.url, index, seed, book_ids, record)
+            names, weights = zip(*mix.items())
+            completed = 0
+            while time.perf_counter() < deadline and (sessions is None or completed < sessions):
+                SESSIONS[user.rng.choices(names, weights)[0]](user)
+                completed += 1
+
+        before = metrics.snapshot()
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        queries = _query_counts(before, metrics.snapshot())
+
+    everything = [latency for step_latencies in latencies.values() for latency in step_latencies]
+    total_requests = sum(count for count, _ in queries.values())
+    return {
+        "meta": run_metadata(seed),
+        "server": server,
+        "workers": workers if server == "wsgi" else None,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "mix": mix,
+        "throughput_rps": round(len(everything) / elapsed, 2),
+        "overall": _summary(everything, sum(errors.values())) if everything else None,
+        "steps": {step: _summary(latencies[step], errors[step]) for step in sorted(latencies)},
+        # 🔹 None when the metrics middleware is disabled
+        "db_queries_per_request": round(sum(total for _, total in queries.values()) / total_requests, 2)
+        if total_requests else None,
+        "db_queries_per_view": {
+            view: round(total / count, 2) for view, (count, total) in sorted(queries.items())
+        },
+    }
@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.test import Client
+from django.test.utils import override_settings
+
+from books.views import BookViewSet
+
+# 🔹 (label, query string, use the `.values()` list path)
+VARIANTS = [
+    ("serializer_all_fields", "", False),
+    ("values_all_fields", "", True),
+    ("serializer_sparse", "fields=id,title,price,stock", False),
+    ("values_sparse", "fields=id,title,price,stock", True),
+]
+
+
+def run_serialization_benchmark(page_size=100, rounds=30, variants=None):
+    """
+    Time `GET /api/books/` pages through the regular serializer and through
+    the `.values()` read path, with and without `?fields=`. The catalog
+    cache is bypassed (dummy cache) so every request really serializes.
+    """
+    client = Client()
+    results = []
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+        for label, query, values_path in variants or VARIANTS:
+            url = f"/api/books/?page_size={page_size}" + (f"&{query}" if query else "")
+            original = BookViewSet.values_list_path
+            BookViewSet.values_list_path = values_path
+            try:
+                client.get(url)  # 🔹 Warm-up
+                latencies, payload = [], 0
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    payload = len(response.content)
+            finally:
+                BookViewSet.values_list_path = original
+            latencies.sort()
+            results.append({
+                "variant": label,
+                "rows": len(response.json()["results"]),
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+                "payload_bytes": payload,
+            })
+    return results
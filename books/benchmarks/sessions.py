@@ -0,0 +1,70 @@
+import statistics
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from books.models import Book
+
+# 🔹 (label, settings overrides) for each storage combination we compare
+BACKENDS = {
+    "db": {"SESSION_ENGINE": "django.contrib.sessions.backends.db", "CART_STORAGE": "session"},
+    "cached_db": {"SESSION_ENGINE": "django.contrib.sessions.backends.cached_db", "CART_STORAGE": "session"},
+    "cache": {"SESSION_ENGINE": "django.contrib.sessions.backends.cache", "CART_STORAGE": "session"},
+    "signed_cookies": {"SESSION_ENGINE": "django.contrib.sessions.backends.signed_cookies", "CART_STORAGE": "session"},
+    "cookie_cart": {"SESSION_ENGINE": "django.contrib.sessions.backends.db", "CART_STORAGE": "cookie"},
+}
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+def _cart_flow(book_ids):
+    """The anonymous add / view / remove flow from books/urls.py"""
+    for book_id in book_ids:
+        yield reverse("add_to_cart", args=[book_id])
+        yield reverse("cart_detail")
+    for book_id in book_ids:
+        yield reverse("remove_from_cart", args=[book_id])
+    yield reverse("cart_detail")
+
+
+def run_session_benchmark(book_ids, backends=None, rounds=20):
+    """
+    Replay the cart flow `rounds` times per backend with a fresh anonymous
+    client each round, timing every request and counting DB writes.
+    """
+    results = []
+    for name in backends or BACKENDS:
+        latencies, queries, writes, requests = [], 0, 0, 0
+        with override_settings(**BACKENDS[name]):
+            for _ in range(rounds):
+                client = Client()
+                for url in _cart_flow(book_ids):
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        client.get(url)
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    requests += 1
+                    queries += len(ctx.captured_queries)
+                    writes += sum(
+                        1 for query in ctx.captured_queries
+                        if query["sql"].lstrip().upper().startswith(WRITE_PREFIXES)
+                    )
+        latencies.sort()
+        results.append({
+            "backend": name,
+            "requests": requests,
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "db_queries_per_request": round(queries / requests, 2),
+            "db_writes": writes,
+            "db_writes_per_request": round(writes / requests, 3),
+        })
+    return results
+
+
+def scratch_books(count=3):
+    return [Book.objects.create(title=f"bench-session-{i}", author="bench", stock=100) for i in range(count)]
@@ -0,0 +1,127 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from books.catalog_cache import BOOKS, book_scope, bump
+from books.models import Book, Category
+from books.serializers import BookSerializer
+
+# Batch edits of many books in one request (`PUT`/`PATCH /api/books/bulk/`).
+#
+# The whole payload is validated first with a fixed number of queries (one
+# for the books, one for the categories) instead of a serializer round trip
+# per item. If every item is valid, the books are locked and written with
+# one `bulk_update` covering only the columns that actually changed, in one
+# transaction; otherwise nothing is written. The cache versions are bumped
+# once that transaction commits (see `catalog_cache.bump`).
+#
+# Every bulk field is plain JSON. `cover_image` is the cover's URL
+# (`Book.cover_image` is a URLField, validated like any other URL), not an
+# uploaded image.
+
+BULK_FIELDS = ["title", "author", "description", "price", "stock", "cover_image", "category"]
+MAX_BULK_ITEMS = 1000
+
+
+def _field_validators():
+    fields = BookSerializer().fields
+    return {name: fields[name] for name in BULK_FIELDS}
+
+
+def _validate_item(item, fields, partial):
+    """`(book_id, values, errors)` for one payload entry, without touching the database"""
+    if not isinstance(item, dict):
+        return None, {}, {"non_field_errors": ["Expected an object."]}
+    book_id, values, errors = item.get("id"), {}, {}
+    if not isinstance(book_id, int) or isinstance(book_id, bool):
+        errors["id"] = ["A book id is required."]
+    unknown = set(item) - set(BULK_FIELDS) - {"id"}
+    if unknown:
+        errors["non_field_errors"] = [f"Not bulk-editable: {', '.join(sorted(unknown))}."]
+    for name, field in fields.items():
+        if name not in item:
+            if not partial and field.required:
+                errors[name] = ["This field is required."]
+            continue
+        if name == "category":
+            # 🔹 Resolved for the whole payload at once, see bulk_update_books
+            value = item[name]
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+                errors[name] = ["Expected a category id."]
+            else:
+                values[name] = value
+            continue
+        try:
+            values[name] = field.run_validation(item[name])
+        except serializers.ValidationError as exc:
+            errors[name] = exc.detail
+    return book_id, values, errors
+
+
+def bulk_update_books(items, partial=False):
+    """
+    Validate and apply `[{"id": 1, "price": "9.99", ...}, ...]`.
+
+    Returns `(applied, results)` where `results` holds one entry per item, in
+    order: `{"id", "status": "updated" | "unchanged" | "invalid" | "skipped",
+    "changed": [...] | "errors": {...}}`. Nothing is written unless every
+    item is valid.
+    """
+    if not isinstance(items, list) or not items:
+        raise serializers.ValidationError("Send a non-empty list of books.")
+    if len(items) > MAX_BULK_ITEMS:
+        raise serializers.ValidationError(f"At most {MAX_BULK_ITEMS} books per request.")
+
+    fields = _field_validators()
+    parsed = [_validate_item(item, fields, partial) for item in items]
+    seen = set()
+    # 🔹 Only checked ints from here on: a bad id may not even be hashable
+    checked = [(book_id, errors) for book_id, _, errors in parsed if "id" not in errors and book_id is not None]
+    for book_id, errors in checked:
+        if book_id in seen:
+            errors["id"] = ["Listed more than once."]
+        seen.add(book_id)
+
+    category_ids = {values["category"] for _, values, _ in parsed if values.get("category") is not None}
+    known_categories = set(Category.objects.filter(id__in=category_ids).values_list("id", flat=True))
+
+    with transaction.atomic():
+        # 🔹 Locked so concurrent checkouts can't have their stock writes undone
+        books = Book.objects.select_for_update().in_bulk([book_id for book_id, errors in checked if "id" not in errors])
+        for book_id, errors in checked:
+            if "id" not in errors and book_id not in books:
+                errors["id"] = ["No such book."]
+        for _, values, errors in parsed:
+            if values.get("category") is not None and values["category"] not in known_categories:
+                errors["category"] = [f'Invalid pk "{values["category"]}" - object does not exist.']
+
+        if any(errors for _, _, errors in parsed):
+            results = [
+                {"id": book_id, "status": "invalid", "errors": errors} if errors else {"id": book_id, "status": "skipped"}
+                for book_id, _, errors in parsed
+            ]
+            return False, results
+
+        now = timezone.now()
+        changed_books, changed_columns, results = [], set(), []
+        for book_id, values, _ in parsed:
+            book = books[book_id]
+            changed = []
+            for name, value in values.items():
+                attname = "category_id" if name == "category" else name
+                if getattr(book, attname) != value:
+                    setattr(book, attname, value)
+                    changed.append(name)
+            if changed:
+                book.updated_at = now  # 🔹 bulk_update skips auto_now
+                changed_books.append(book)
+                changed_columns.update(changed)
+                results.append({"id": book_id, "status": "updated", "changed": changed})
+            else:
+                results.append({"id": book_id, "status": "unchanged"})
+
+        if changed_books:
+            Book.objects.bulk_update(changed_books, sorted(changed_columns) + ["updated_at"])
+            # 🔹 No post_save signals from bulk_update: invalidate what they would have, after commit
+            bump(BOOKS, *[book_scope(book.id) for book in changed_books])
+    return True, results
@@ -1,25 +1,90 @@
+import threading
+from collections import namedtuple
 from decimal import Decimal
+
+from books.cart_storage import CookieCartStorage, SessionCartStorage, get_cart_storage
 from books.models import Book
 
+CartSnapshot = namedtuple("CartSnapshot", ["items", "total_price", "all_in_stock"])
+
+# 🔹 Process-wide counters: how many carts were built vs. how many had to write
+_stats_lock = threading.Lock()
+_stats = {"carts": 0, "session_writes": 0}
+
+
+def cart_stats():
+    """Snapshot of cart session-write counters for this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["session_writes_avoided"] = stats["carts"] - stats["session_writes"]
+    return stats
+
+
+def reset_cart_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def to_cents(price):
+    return int((Decimal(str(price)) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    return (Decimal(cents) / 100).quantize(Decimal("0.01"))
+
+
 class Cart:
+    """
+    Cart that only touches its storage when it must.
+
+    Contents are read from the storage (the session, or a signed cookie for
+    anonymous users, see `books.cart_storage`) on first use, and written back
+    only when a mutation actually changes them, so read-only requests never
+    dirty a DB-backed session. Entries are stored compactly as
+    `{"<book_id>": [quantity, unit_price_cents]}`.
+
+    Iteration and totals read a per-request snapshot built with one query,
+    so templates can loop over the cart as often as they like.
+    """
+
     def __init__(self, request):
-        """Initialize the cart session"""
-        self.session = request.session
-        self.cart = self.session.get("cart", {})
-        self.session["cart"] = self.cart
+        """Initialize the cart (storage isn't read until needed)"""
+        self.storage = get_cart_storage(request)
+        self._cart = None
+        self._snapshot = None
+        self._written = False
+        _count("carts")
+
+    @property
+    def cart(self):
+        """`{book_id: [quantity, price_cents]}`, loaded lazily from storage"""
+        if self._cart is None:
+            self._cart = self._load(self.storage.load())
+        return self._cart
+
+    @staticmethod
+    def _load(stored):
+        # 🔹 Carts saved before the compact format used {"quantity", "price": float}
+        return {
+            book_id: [entry["quantity"], to_cents(entry["price"])] if isinstance(entry, dict) else list(entry)
+            for book_id, entry in stored.items()
+        }
 
     def add(self, book, quantity=1, update_quantity=False):
         """Add or update a book in the cart"""
         book_id = str(book.id)
-        if book_id not in self.cart:
-            self.cart[book_id] = {"quantity": 0, "price": float(book.price)}
-        
-        if update_quantity:
-            self.cart[book_id]["quantity"] = max(1, quantity)  # Ensure at least 1
-        else:
-            self.cart[book_id]["quantity"] += quantity
-
-        self.save()
+        current = self.cart.get(book_id)
+        new_quantity = max(1, quantity) if update_quantity else (current[0] if current else 0) + quantity
+        entry = [new_quantity, current[1] if current else to_cents(book.price)]
+        if entry != current:
+            self.cart[book_id] = entry
+            self.save()
 
     def remove(self, book):
         """Remove a book from the cart"""
@@ -29,36 +94,83 @@ class Cart:
             self.save()
 
     def save(self):
-        """Mark the session as modified to save changes"""
-        self.session.modified = True
+        """Write the contents back to storage"""
+        self.storage.save(self.cart)
+        self._snapshot = None
+        if not self._written:
+            self._written = True
+            _count("session_writes")
 
-    def __iter__(self):
-        """Yield cart items with book details"""
-        book_ids = self.cart.keys()
-        books = Book.objects.filter(id__in=book_ids)  # Fetch all books in cart
-        book_map = {str(book.id): book for book in books}  # Map book ID to book
+    def lines(self):
+        """`(book_id, quantity, unit_price)` tuples straight from storage, no queries"""
+        return [(int(book_id), quantity, from_cents(cents)) for book_id, (quantity, cents) in self.cart.items()]
+
+    def __len__(self):
+        """Number of books in the cart, counting quantities"""
+        return sum(quantity for quantity, _ in self.cart.values())
 
-        for book_id, item in self.cart.items():
+    @property
+    def snapshot(self):
+        """Line items, total and stock flags, computed once per request"""
+        if self._snapshot is None:
+            self._snapshot = self._build_snapshot()
+        return self._snapshot
+
+    def _build_snapshot(self):
+        cart = self.cart
+        books = (
+            Book.objects.filter(id__in=cart.keys()).values("id", "title", "author", "cover_image", "stock")
+            if cart else ()
+        )
+        book_map = {str(book["id"]): book for book in books}  # Map book ID to book
+
+        items = []
+        for book_id, (quantity, cents) in cart.items():
             book = book_map.get(book_id)
             if book:
-                yield {
-                    "book": {
-                        "id": book.id,
-                        "title": book.title,
-                        "author": book.author,
-                        "cover_image": book.cover_image
-                    },
-                    "price": Decimal(str(item["price"])),
-                    "quantity": item["quantity"],
-                    "total_price": Decimal(str(item["price"])) * item["quantity"]
-                }
+                stock = book.pop("stock")
+                items.append({
+                    "book": book,
+                    "price": from_cents(cents),
+                    "quantity": quantity,
+                    "total_price": from_cents(cents * quantity),
+                    "stock": stock,
+                    "in_stock": stock >= quantity,
+                })
+        total = from_cents(sum(quantity * cents for quantity, cents in cart.values()))
+        return CartSnapshot(items, total, all(item["in_stock"] for item in items))
+
+    def __iter__(self):
+        """Yield cart items with book details"""
+        return iter(self.snapshot.items)
 
     def get_total_price(self):
         """Calculate total cart price"""
-        total =  sum(Decimal(item["price"]) * item["quantity"] for item in self.cart.values())
-        return Decimal(total).quantize(Decimal("0.01"))
+        if self._snapshot is not None:
+            return self._snapshot.total_price
+        return from_cents(sum(quantity * cents for quantity, cents in self.cart.values()))
 
     def clear(self):
-        """Clear the cart session"""
-        self.session["cart"] = {}
-        self.save()
+        """Empty the cart"""
+        if self.cart:
+            self._cart = {}
+            self.save()
+
+
+def merge_cookie_cart(request):
+    """
+    On login, move an anonymous cookie cart into the session cart (quantities
+    of a book in both add up) and clear the cookie, so the cart built before
+    logging in is the one checked out.
+    """
+    cookie = CookieCartStorage(request)
+    lines = Cart._load(cookie.load())
+    if not lines:
+        return
+    session = SessionCartStorage(request)
+    merged = Cart._load(session.load())
+    for book_id, (quantity, cents) in lines.items():
+        current = merged.get(book_id)
+        merged[book_id] = [current[0] + quantity, current[1]] if current else [quantity, cents]
+    session.save(merged)
+    cookie.save({})  # 🔹 CartCookieMiddleware deletes the cookie on the way out
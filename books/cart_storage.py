@@ -0,0 +1,72 @@
+import json
+
+from django.conf import settings
+
+CART_SESSION_KEY = "cart"
+CART_COOKIE_NAME = "cart"
+CART_COOKIE_SALT = "books.cart"
+CART_COOKIE_MAX_AGE = 60 * 60 * 24 * 14  # 🔹 Two weeks, like the session cookie
+
+
+class SessionCartStorage:
+    """Keeps the cart in `request.session` (whatever SESSION_ENGINE is)"""
+
+    def __init__(self, request):
+        self.session = request.session
+
+    def load(self):
+        return self.session.get(CART_SESSION_KEY) or {}
+
+    def save(self, data):
+        self.session[CART_SESSION_KEY] = data  # Assigning marks the session as modified
+
+
+class CookieCartStorage:
+    """
+    Keeps an anonymous visitor's cart in a signed cookie, so browsing and
+    cart changes need no session row at all. `CartCookieMiddleware` writes
+    the cookie on the way out, only when the cart changed.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def load(self):
+        if hasattr(self.request, "_cart_cookie"):
+            return self.request._cart_cookie
+        raw = self.request.get_signed_cookie(
+            CART_COOKIE_NAME, default=None, salt=CART_COOKIE_SALT, max_age=CART_COOKIE_MAX_AGE
+        )
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return {}  # 🔹 Unreadable: start a fresh cart (tampered/expired cookies give None)
+
+    def save(self, data):
+        self.request._cart_cookie = data
+
+
+def get_cart_storage(request):
+    """Pick the cart store from `settings.CART_STORAGE` ("session" or "cookie")"""
+    user = getattr(request, "user", None)
+    if getattr(settings, "CART_STORAGE", "session") == "cookie" and not (user and user.is_authenticated):
+        return CookieCartStorage(request)
+    return SessionCartStorage(request)
+
+
+def set_cart_cookie(request, response):
+    """Called by `CartCookieMiddleware` to persist a changed cookie cart"""
+    if not hasattr(request, "_cart_cookie"):
+        return
+    if request._cart_cookie:
+        response.set_signed_cookie(
+            CART_COOKIE_NAME,
+            json.dumps(request._cart_cookie, separators=(",", ":")),
+            salt=CART_COOKIE_SALT,
+            max_age=CART_COOKIE_MAX_AGE,
+            httponly=True,
+            samesite="Lax",
+            secure=settings.SESSION_COOKIE_SECURE,
+        )
+    else:
+        response.delete_cookie(CART_COOKIE_NAME, samesite="Lax")
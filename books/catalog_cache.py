@@ -0,0 +1,271 @@
+import hashlib
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from books import db_router
+
+# Versioned catalog cache.
+#
+# Every cached entry's key embeds the current version numbers of the scopes
+# it was built from ("books", "book:42", "categories", ...). Signals bump a
+# scope's version when something in it changes, which orphans the old
+# entries instead of hunting them down; they simply age out of the cache.
+# Versions are counters bumped with the cache's atomic `incr`, after the
+# writing transaction commits; each scope's last bump time is kept beside
+# its version, as the collection's last-modified time for HTTP conditional
+# requests. Versions live in the cache, so every worker process must share
+# one (CACHE_BACKEND=file or redis) for a bump to reach them all.
+
+CATALOG = "catalog"  # 🔹 Part of every entry's key; bump it to drop everything
+BOOKS = "books"
+CATEGORIES = "categories"
+REVIEWS = "reviews"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "bypassed": 0}
+
+
+def catalog_cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_catalog_cache_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 600)
+
+
+def book_scope(book_id):
+    return f"book:{book_id}"
+
+
+def category_scope(category_id):
+    return f"category:{category_id}"
+
+
+def _version_key(scope):
+    return f"catalog:v:{scope}"
+
+
+def _modified_key(scope):
+    return f"catalog:m:{scope}"
+
+
+def _now_version():
+    # 🔹 Counters start from the clock, so an evicted version key can't restart at an old number
+    return time.time_ns() // 1000
+
+
+def _read_scopes(scopes):
+    """`(versions, modified)` of `scopes` in one cache read, seeding any missing key"""
+    keys = [_version_key(scope) for scope in scopes] + [_modified_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            seed = _now_version()
+            cache.add(key, seed, timeout=None)
+            # 🔹 A cache that stores nothing (DummyCache) just means nothing is ever cached
+            found[key] = cache.get(key) or seed
+    values = [found[key] for key in keys]
+    return values[:len(scopes)], values[len(scopes):]
+
+
+def get_versions(scopes):
+    return _read_scopes(scopes)[0]
+
+
+def get_validators(scopes):
+    """`(versions, last_modified)` of `scopes`: the versions and the time of their latest bump"""
+    versions, modified = _read_scopes(scopes)
+    return versions, _as_datetime(max(modified))
+
+
+def bump(*scopes):
+    """Invalidate everything cached under `scopes`, once the current transaction commits"""
+    # 🔹 Bumping before commit would let a concurrent read cache pre-commit rows under the new version
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    now = _now_version()
+    for scope in scopes:
+        key = _version_key(scope)
+        cache.add(key, now, timeout=None)
+        try:
+            cache.incr(key)  # 🔹 Atomic: concurrent bumps never hand out the same version
+        except ValueError:
+            pass  # 🔹 Evicted in between: the next read seeds a fresh, higher one
+    cache.set_many({_modified_key(scope): now for scope in scopes}, timeout=None)
+
+
+def _as_datetime(timestamp):
+    """Microseconds since the epoch as an aware datetime"""
+    return datetime.fromtimestamp(timestamp / 1_000_000, tz=timezone.utc)
+
+
+def invalidate_catalog():
+    """Drop every cached catalog entry, e.g. after a bulk `update()` that skips signals"""
+    bump(CATALOG)
+
+
+def _entry_key(kind, identity, versions):
+    digest = hashlib.md5(identity.encode(), usedforsecurity=False).hexdigest()
+    return f"catalog:{kind}:{digest}:{'.'.join(str(version) for version in versions)}"
+
+
+def entry_key(kind, identity, scopes):
+    return _entry_key(kind, identity, get_versions([CATALOG, *scopes]))
+
+
+def lookup(kind, identity, scopes):
+    """
+    `(key, cached value or None, recent)` for `identity` at the current
+    versions. `recent` means a scope changed within the replica lag allowance.
+    """
+    versions, modified = _read_scopes([CATALOG, *scopes])
+    key = _entry_key(kind, identity, versions)
+    value = cache.get(key)
+    _count("hits" if value is not None else "misses")
+    return key, value, _now_version() - max(modified) < db_router.pin_seconds() * 1_000_000
+
+
+def _build_source(recent):
+    # 🔹 A replica may not have the change yet, and the entry would outlive the lag under the new version
+    return db_router.use_primary() if recent else nullcontext()
+
+
+def get_or_build(kind, identity, scopes, build):
+    """Return the cached value for `identity` at the current versions, or build and store it"""
+    key, value, recent = lookup(kind, identity, scopes)
+    if value is None:
+        with _build_source(recent):
+            value = build()
+        if value is not None:
+            cache.set(key, value, _timeout())
+    return value
+
+
+async def aget_or_build(kind, identity, scopes, build):
+    """`get_or_build` for async views: `build` is a coroutine function"""
+    # 🔹 One thread hop for the version reads and the entry read together
+    key, value, recent = await sync_to_async(lookup)(kind, identity, scopes)
+    if value is None:
+        with _build_source(recent):
+            value = await build()
+        if value is not None:
+            await cache.aset(key, value, _timeout())
+    return value
+
+
+def _page_payload(response):
+    if response.status_code != 200 or response.streaming:
+        return None
+    return {"content": response.content, "content_type": response["Content-Type"]}
+
+
+def _is_personalised(request):
+    return request.method != "GET" or request.user.is_authenticated or len(get_messages(request))
+
+
+def cache_page_for_anonymous(scopes):
+    """
+    Serve a catalog page's rendered HTML from cache for anonymous GETs.
+
+    `scopes(request, *args, **kwargs)` names the version scopes the page
+    depends on. Logged-in users (personalised nav, review form) and
+    visitors with pending flash messages always get a fresh render. Works
+    on sync and async views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def awrapped(request, *args, **kwargs):
+                # 🔹 The user and messages live in the session, which is sync-only
+                if await sync_to_async(_is_personalised)(request):
+                    _count("bypassed")
+                    return await view(request, *args, **kwargs)
+
+                rendered = {}
+
+                async def build():
+                    rendered["response"] = await view(request, *args, **kwargs)
+                    return _page_payload(rendered["response"])
+
+                page = await aget_or_build("page", request.build_absolute_uri(), scopes(request, *args, **kwargs), build)
+                if "response" in rendered:
+                    return rendered["response"]
+                return HttpResponse(page["content"], content_type=page["content_type"])
+            return awrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if _is_personalised(request):
+                _count("bypassed")
+                return view(request, *args, **kwargs)
+
+            rendered = {}
+
+            def build():
+                rendered["response"] = view(request, *args, **kwargs)
+                return _page_payload(rendered["response"])
+
+            page = get_or_build("page", request.build_absolute_uri(), scopes(request, *args, **kwargs), build)
+            if "response" in rendered:
+                return rendered["response"]
+            return HttpResponse(page["content"], content_type=page["content_type"])
+        return wrapped
+    return decorator
+
+
+class CatalogCacheMixin:
+    """
+    Caches the serialized payload of `list` and `retrieve` for a viewset.
+
+    Only the data is cached; rendering still follows the request's Accept
+    header. Set `cache_scope` (collection) and `cache_item_scope` (a
+    staticmethod taking the lookup value) on the viewset.
+    """
+
+    cache_scope = None
+    cache_item_scope = None
+
+    def _cached_response(self, request, scopes, action, *args, **kwargs):
+        built = {}
+
+        def build():
+            response = built["response"] = action(request, *args, **kwargs)
+            return response.data if response.status_code == 200 else None
+
+        data = get_or_build("api", request.build_absolute_uri(), scopes, build)
+        if "response" in built:
+            return built["response"]
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, [self.cache_scope], super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        scopes = [self.cache_item_scope(lookup)]
+        return self._cached_response(request, scopes, super().retrieve, *args, **kwargs)
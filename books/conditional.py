@@ -0,0 +1,141 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.exceptions import ValidationError
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from books.catalog_cache import CATALOG, get_validators
+
+# HTTP conditional GET (ETag / Last-Modified / 304) for catalog reads.
+#
+# Single objects are validated against their `updated_at` with one
+# primary-key lookup; collections against their catalog-cache version
+# (books/catalog_cache.py), which needs no database query at all. Either
+# way a matching If-None-Match / If-Modified-Since returns 304 before any
+# serialization or template rendering happens.
+
+
+def make_etag(*parts):
+    return hashlib.sha1("|".join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _max_age():
+    return getattr(settings, "CATALOG_HTTP_MAX_AGE", 60)
+
+
+def _is_shared_view(request):
+    """Anonymous visitors without flash messages all see the same page"""
+    return not request.user.is_authenticated and not len(get_messages(request))
+
+
+def list_validators(scope, path, media_type):
+    """`(etag, last_modified)` of a catalog collection, from its cache versions alone"""
+    versions, last_modified = get_validators([CATALOG, scope])
+    return make_etag(*versions, path, media_type), last_modified
+
+
+def item_etag(updated_at, path, media_type):
+    return make_etag(updated_at.isoformat(), path, media_type)
+
+
+def with_cache_control(response):
+    if response.status_code in (200, 304):
+        patch_cache_control(response, public=True, max_age=_max_age())
+    return response
+
+
+def conditional_page(updated_at):
+    """
+    ETag/Last-Modified/304 for an HTML catalog page, for anonymous visitors.
+
+    `updated_at(request, *args, **kwargs)` returns the page's last change
+    (or None for "not found"); for an async view it is a coroutine function
+    too. Logged-in pages embed per-user content and a CSRF token, so they
+    are always rendered in full.
+    """
+    def decorator(view):
+        def last_modified(request, *args, **kwargs):
+            if not hasattr(request, "_page_updated_at"):
+                request._page_updated_at = updated_at(request, *args, **kwargs)
+            return request._page_updated_at
+
+        def etag(request, *args, **kwargs):
+            modified = last_modified(request, *args, **kwargs)
+            return make_etag("html", request.get_full_path(), modified.isoformat()) if modified else None
+
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def awrapped(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD") or not await sync_to_async(_is_shared_view)(request):
+                    return await view(request, *args, **kwargs)
+                # 🔹 Fetched up front: condition() calls its validators synchronously
+                request._page_updated_at = await updated_at(request, *args, **kwargs)
+                return with_cache_control(await conditional_view(request, *args, **kwargs))
+            return awrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or not _is_shared_view(request):
+                return view(request, *args, **kwargs)
+            return with_cache_control(conditional_view(request, *args, **kwargs))
+        return wrapped
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified/304 handling to a viewset's `list` and `retrieve`.
+
+    `conditional_scope` names the catalog-cache scope whose version changes
+    whenever anything in the collection does.
+    """
+
+    conditional_scope = None
+
+    def _representation(self, request):
+        return request.get_full_path(), request.accepted_media_type
+
+    def _list_validators(self, request):
+        if not hasattr(self, "_validators"):
+            self._validators = list_validators(self.conditional_scope, *self._representation(request))
+        return self._validators
+
+    def _list_etag(self, request, *args, **kwargs):
+        return self._list_validators(request)[0]
+
+    def _list_last_modified(self, request, *args, **kwargs):
+        return self._list_validators(request)[1]
+
+    def _item_updated_at(self, request, *args, **kwargs):
+        if not hasattr(self, "_updated_at"):
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                self._updated_at = (
+                    self.get_queryset()
+                    .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                    .values_list("updated_at", flat=True)
+                    .first()
+                )
+            except (TypeError, ValueError, ValidationError):
+                self._updated_at = None  # 🔹 A malformed id: retrieve() turns it into a 404
+        return self._updated_at
+
+    def _item_etag(self, request, *args, **kwargs):
+        updated_at = self._item_updated_at(request, *args, **kwargs)
+        if updated_at is None:
+            return None  # 🔹 Let retrieve() produce the 404
+        return item_etag(updated_at, *self._representation(request))
+
+    def list(self, request, *args, **kwargs):
+        view = condition(etag_func=self._list_etag, last_modified_func=self._list_last_modified)(super().list)
+        return with_cache_control(view(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        view = condition(etag_func=self._item_etag, last_modified_func=self._item_updated_at)(super().retrieve)
+        return with_cache_control(view(request, *args, **kwargs))
@@ -0,0 +1,13 @@
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from books.db_pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    """PostgreSQL through the in-process pool"""
+
+    def adopt_connection(self, connection):
+        # 🔹 get_new_connection() records the isolation level on the wrapper; a borrowed connection keeps its own
+        level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = IsolationLevel.READ_COMMITTED if level is None else IsolationLevel(level)
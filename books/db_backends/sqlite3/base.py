@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from books.db_pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    """SQLite through the in-process pool (in-memory databases aren't pooled)"""
@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+# In-process database connection pool (DB_CONN_MODE=pool).
+#
+# Django opens a connection the first time a thread needs one and, with
+# CONN_MAX_AGE=0, closes it when the request ends. The pooled engines
+# (books/db_backends/) keep that lifecycle but route it through a pool: the
+# "open" takes an idle connection when there is one, and the "close" hands
+# it back instead of hanging up. A process never holds more than
+# `max_size` connections per database, however many threads it runs;
+# a thread that finds the pool exhausted waits up to `timeout` seconds.
+#
+# Connections are pinged on checkout (when `health_checks` is on) and
+# dropped after `max_idle` seconds unused, so a restarted or failed-over
+# server costs one reconnect instead of an error page.
+
+DEFAULTS = {"max_size": 10, "timeout": 5.0, "max_idle": 300.0, "health_checks": True}
+
+_pools_lock = threading.Lock()
+_pools = {}  # alias -> ConnectionPool
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """A bounded, thread-safe set of raw DB-API connections"""
+
+    def __init__(self, max_size, timeout, max_idle, health_checks, ping=None):
+        self._ping = ping or _ping
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_checks = health_checks
+        self.pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = deque()  # (raw connection, released at)
+        self._size = 0  # 🔹 Open connections: idle + checked out
+        self._stats = {"checkouts": 0, "waits": 0, "wait_seconds": 0.0, "timeouts": 0, "created": 0, "discarded": 0}
+
+    def acquire(self, connect):
+        """`(connection, reused)`; `connect()` opens a new one when no idle one is left"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, released_at = self._idle.pop()  # 🔹 Most recently used first: it's the likeliest alive
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    raw = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._count_wait(started)
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout}s (pool size {self.max_size})")
+                waited = True
+                self._cond.wait(remaining)
+            self._stats["checkouts"] += 1
+            if waited:
+                self._count_wait(started)
+
+        if raw is not None and not self._reusable(raw, released_at):
+            self._hang_up(raw)
+            with self._cond:
+                self._stats["discarded"] += 1
+            raw = None  # 🔹 Keep the slot and open a fresh connection in it
+        if raw is None:
+            try:
+                raw = connect()
+            except Exception:
+                self._free_slot()
+                raise
+            with self._cond:
+                self._stats["created"] += 1
+            return raw, False
+        return raw, True
+
+    def _count_wait(self, started):
+        self._stats["waits"] += 1
+        self._stats["wait_seconds"] += time.monotonic() - started
+
+    def release(self, raw, reusable=True):
+        if reusable:
+            with self._cond:
+                self._idle.append((raw, time.monotonic()))
+                self._cond.notify()
+        else:
+            self._hang_up(raw)
+            self._free_slot()
+
+    def _reusable(self, raw, released_at):
+        if self.max_idle and time.monotonic() - released_at > self.max_idle:
+            return False
+        if not self.health_checks:
+            return True
+        try:
+            self._ping(raw)
+        except Exception:
+            return False
+        return True
+
+    def _free_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _hang_up(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for raw, _ in idle:
+            self._hang_up(raw)
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, size=self._size, idle=len(self._idle), max_size=self.max_size)
+
+
+def _ping(raw):
+    cursor = raw.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+
+def get_pool(alias, options):
+    """The pool for database `alias` in this process, created on first use"""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        # 🔹 A forked worker must not share its parent's sockets
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[alias] = ConnectionPool(**{**DEFAULTS, **options})
+        return pool
+
+
+def pool_stats():
+    """`{alias: stats}` for every pool this process has opened"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in sorted(pools.items())}
+
+
+def close_pools(*aliases):
+    """Hang up the idle connections of the given pools (default: all) and forget them"""
+    with _pools_lock:
+        pools = [_pools.pop(alias) for alias in (aliases or list(_pools)) if alias in _pools]
+    for pool in pools:
+        pool.close_all()
+
+
+class PooledConnectionMixin:
+    """
+    DatabaseWrapper mixin: `connect()` checks a connection out of the pool and
+    `close()` gives it back. Settings come from the database's "POOL" dict.
+    """
+
+    @property
+    def connection_pool(self):
+        return get_pool(self.alias, self.settings_dict.get("POOL") or {})
+
+    def _pooling(self):
+        # 🔹 SQLite's shared in-memory test database dies with its last connection
+        return not (hasattr(self, "is_in_memory_db") and self.is_in_memory_db())
+
+    def get_new_connection(self, conn_params):
+        if not self._pooling():
+            return super().get_new_connection(conn_params)
+        raw, reused = self.connection_pool.acquire(lambda: super(PooledConnectionMixin, self).get_new_connection(conn_params))
+        if reused:
+            self.adopt_connection(raw)
+        return raw
+
+    def adopt_connection(self, connection):
+        """Set up this wrapper for a pooled connection, as `get_new_connection()` does for a fresh one"""
+
+    def _close(self):
+        if self.connection is None or not self._pooling():
+            return super()._close()
+        raw = self.connection
+        # 🔹 A connection closed mid-transaction can't be trusted to the next borrower
+        reusable = not self.in_atomic_block
+        if reusable and not self.autocommit:
+            try:
+                raw.rollback()
+            except Exception:
+                reusable = False
+        with self.wrap_database_errors:
+            self.connection_pool.release(raw, reusable)
@@ -0,0 +1,103 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Read-replica routing with read-your-writes.
+#
+# Reads of the catalog models (books, categories, reviews) are spread over
+# REPLICA_DATABASES; every write, and every read of anything else (users,
+# orders, sessions, tokens), goes to the primary. Replicas lag the primary a
+# little, so a client that writes a catalog row is pinned to the primary:
+# for the rest of that request, and for DB_PRIMARY_PIN_SECONDS afterwards
+# through a cookie (see PrimaryPinMiddleware). Unsafe requests, and reads
+# inside a transaction on the primary (select_for_update...), never leave it.
+
+REPLICATED_MODELS = {"books.book", "books.category", "books.review"}
+PIN_COOKIE = "primary_pin"
+
+
+class RoutingState:
+    """Per-request routing: `pinned` to the primary, `wrote` a replicated model, the `replica` chosen"""
+
+    __slots__ = ("pinned", "wrote", "replica")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+
+# 🔹 A ContextVar, not a thread local: asgiref carries it into the ORM's thread under ASGI
+_state = ContextVar("db_routing", default=None)
+
+
+def replica_databases():
+    return getattr(settings, "REPLICA_DATABASES", [])
+
+
+def pin_seconds():
+    return getattr(settings, "DB_PRIMARY_PIN_SECONDS", 5)
+
+
+def begin_request(pinned):
+    """Start routing state for one request; returns the token for `end_request`"""
+    return _state.set(RoutingState(pinned))
+
+
+def end_request(token):
+    """Drop the request's routing state; True if it wrote a replicated model"""
+    state = _state.get()
+    _state.reset(token)
+    return state is not None and state.wrote
+
+
+@contextmanager
+def use_primary():
+    """Send every read in the block to the primary"""
+    state = _state.get()
+    if state is None:
+        token = _state.set(RoutingState(pinned=True))
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+    pinned, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_databases()
+        if not replicas:
+            return None
+        if model._meta.label_lower not in REPLICATED_MODELS:
+            return DEFAULT_DB_ALIAS  # 🔹 Not None: Django would follow the instance hint to a replica
+        state = _state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state is None:
+            return random.choice(replicas)
+        if state.replica is None:
+            state.replica = random.choice(replicas)  # 🔹 One replica per request: one consistent snapshot
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        if not replica_databases():
+            return None
+        state = _state.get()
+        if state is not None and model._meta.label_lower in REPLICATED_MODELS:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_databases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,28 @@
+class EagerLoadingMixin:
+    """
+    Applies a viewset's declared eager-loading plan for the current action.
+
+    `query_plans` maps an action name (or "default") to the relations its
+    serializer touches, e.g.::
+
+        query_plans = {
+            "default": {"select_related": ["user"], "prefetch_related": ["items"]},
+        }
+
+    so nested serializers read joined/prefetched rows instead of issuing one
+    query per object.
+    """
+
+    query_plans = {}
+
+    def get_query_plan(self):
+        return self.query_plans.get(self.action) or self.query_plans.get("default") or {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = self.get_query_plan()
+        if plan.get("select_related"):
+            queryset = queryset.select_related(*plan["select_related"])
+        if plan.get("prefetch_related"):
+            queryset = queryset.prefetch_related(*plan["prefetch_related"])
+        return queryset
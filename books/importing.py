@@ -0,0 +1,215 @@
+import codecs
+import csv
+import json
+from decimal import InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import DatabaseError, transaction
+
+from books.catalog_cache import CATEGORIES, bump, invalidate_catalog
+from books.models import Book, Category
+
+# Bulk catalog import from CSV or JSON Lines.
+#
+# Rows are read one at a time and written in batches, so memory depends on
+# the batch size, not the file size. Each batch is one upsert keyed on the
+# book's ISBN (`INSERT ... ON CONFLICT (isbn) DO UPDATE`): re-importing a
+# file updates the books instead of duplicating them. Category names are
+# resolved through an in-memory map that grows only with unseen names.
+# A row is the whole truth about its book: optional columns left empty are
+# cleared on update.
+
+FORMATS = ("csv", "jsonl")
+# 🔹 Columns an import may overwrite; ratings and created_at belong to the store
+UPDATE_FIELDS = ["title", "author", "description", "price", "stock", "cover_image", "category", "updated_at"]
+MAX_REPORTED_ERRORS = 1000
+MAX_STOCK = 2_147_483_647  # 🔹 PositiveIntegerField's range on PostgreSQL; SQLite would take more
+
+_price_field = Book._meta.get_field("price")
+_validate_url = URLValidator()
+
+
+class UndecodableLine(ValueError):
+    def __init__(self, line_number, encoding):
+        super().__init__(f"Not valid {encoding} text; the import stopped here")
+        self.line_number = line_number
+
+
+def detect_format(name):
+    """`jsonl` for .jsonl/.ndjson file names or JSON-ish media types, else `csv`"""
+    name = name.split(";")[0].strip().lower()  # 🔹 A Content-Type may carry parameters: "...; charset=utf-8"
+    return "jsonl" if name.endswith((".jsonl", ".ndjson", ".json", "ndjson", "jsonl", "/json")) else "csv"
+
+
+def read_rows(lines, fmt):
+    """Yield `(line_number, dict)` from text lines; unparseable lines yield an error string instead"""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, f"Invalid JSON: {exc}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Each line must be a JSON object"
+
+
+def decode_lines(binary_lines, encoding=None):
+    """
+    Decode an uploaded file or request body lazily, line by line, in its
+    declared charset (UTF-8 if none). Raises `UndecodableLine` rather than
+    guess at bytes that aren't valid in it.
+    """
+    encoding = encoding or "utf-8"
+    codecs.lookup(encoding)  # 🔹 LookupError up front for an unknown charset
+    for line_number, line in enumerate(binary_lines, start=1):
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            raise UndecodableLine(line_number, encoding) from None
+
+
+def _text(row, name, errors, required=False, max_length=255):
+    value = row.get(name)
+    value = str(value).strip() if value is not None else ""
+    if required and not value:
+        errors[name] = "This field is required."
+    elif len(value) > max_length:
+        errors[name] = f"At most {max_length} characters."
+    return value or None
+
+
+def parse_row(row):
+    """`(values, errors)` for one input row; hand-rolled so a million rows don't pay for a serializer each"""
+    errors = {}
+    isbn = (_text(row, "isbn", errors, required=True, max_length=17) or "").replace("-", "").upper()
+    digits = isbn[:-1] if len(isbn) == 10 and isbn.endswith("X") else isbn
+    if isbn and (len(isbn) not in (10, 13) or not digits.isdigit()):
+        errors["isbn"] = "Must be a 10 or 13 digit ISBN."
+    values = {
+        "isbn": isbn,
+        "title": _text(row, "title", errors, required=True),
+        "author": _text(row, "author", errors, required=True),
+        "description": _text(row, "description", errors, max_length=100_000),
+        "cover_image": _text(row, "cover_image", errors, max_length=200),
+        "category": _text(row, "category", errors),
+    }
+    if values["cover_image"]:
+        try:
+            _validate_url(values["cover_image"])
+        except ValidationError:
+            errors["cover_image"] = "Enter a valid URL."
+
+    price = row.get("price")
+    if price in (None, ""):
+        errors["price"] = "This field is required."
+    else:
+        try:
+            values["price"] = _price_field.to_python(str(price))
+            _price_field.run_validators(values["price"])
+            if values["price"] < 0:
+                raise ValidationError("negative")
+        except (ValidationError, InvalidOperation):
+            errors["price"] = "Enter a non-negative price with at most 2 decimal places."
+    stock = row.get("stock")
+    if stock in (None, ""):
+        errors["stock"] = "This field is required."
+    else:
+        try:
+            if isinstance(stock, bool) or (isinstance(stock, float) and not stock.is_integer()):
+                raise ValueError
+            values["stock"] = int(stock)
+            if not 0 <= values["stock"] <= MAX_STOCK:
+                raise ValueError
+        except (TypeError, ValueError, OverflowError):
+            errors["stock"] = f"Enter a whole number from 0 to {MAX_STOCK}."
+    return values, errors
+
+
+class BookImporter:
+    """Upserts parsed rows batch by batch and collects a per-row report"""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.categories = {}  # 🔹 name -> id, filled on demand
+        self.created = self.updated = self.failed = 0
+        self.errors = []
+
+    def _error(self, line, isbn, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "isbn": isbn, "errors": errors})
+
+    def _category_ids(self, names):
+        missing = {name for name in names if name and name not in self.categories}
+        if missing:
+            self.categories.update(Category.objects.filter(name__in=missing).values_list("name", "id"))
+            new = missing - self.categories.keys()
+            if new:
+                Category.objects.bulk_create([Category(name=name) for name in new], ignore_conflicts=True)
+                self.categories.update(Category.objects.filter(name__in=new).values_list("name", "id"))
+                bump(CATEGORIES)
+
+    def _write(self, batch):
+        # 🔹 One upsert can't touch a row twice: the last row for an ISBN wins
+        by_isbn = {values["isbn"]: values for _, values in batch}
+        self._category_ids(values["category"] for values in by_isbn.values())
+        books = []
+        for values in by_isbn.values():
+            category = values.pop("category")
+            books.append(Book(**values, category_id=self.categories.get(category)))
+        existing = set(Book.objects.filter(isbn__in=by_isbn).values_list("isbn", flat=True))
+        try:
+            with transaction.atomic():  # 🔹 A savepoint, so the rest of the import can go on
+                Book.objects.bulk_create(books, update_conflicts=True, unique_fields=["isbn"], update_fields=UPDATE_FIELDS)
+        except DatabaseError as exc:
+            for line, values in batch:
+                self._error(line, values["isbn"], {"row": f"Not saved, the database refused this batch: {exc}"})
+            return
+        self.updated += len(existing)
+        self.created += len(by_isbn) - len(existing)
+        self.updated += len(batch) - len(by_isbn)  # 🔹 Earlier duplicates in the batch were superseded
+
+    def run(self, rows):
+        batch = []
+        try:
+            for line, row in rows:
+                if isinstance(row, str):
+                    self._error(line, None, {"row": row})
+                    continue
+                values, errors = parse_row(row)
+                if errors:
+                    self._error(line, values.get("isbn"), errors)
+                    continue
+                batch.append((line, values))
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+        except UndecodableLine as exc:
+            # 🔹 A CSV reader can't resync after a bad line: keep the rows read so far and report where it stopped
+            self._error(exc.line_number, None, {"row": str(exc)})
+        if batch:
+            self._write(batch)
+        if self.created or self.updated:
+            invalidate_catalog()  # 🔹 Bulk upserts skip the signals that bump cache versions
+        return self.report()
+
+    def report(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_books(lines, fmt="csv", batch_size=1000):
+    """Import books from an iterable of text lines; returns `{"created", "updated", "failed", "errors", ...}`"""
+    return BookImporter(batch_size).run(read_rows(lines, fmt))
@@ -0,0 +1,87 @@
+from collections import Counter, namedtuple
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Now
+
+from books.catalog_cache import BOOKS, book_scope, bump
+from books.models import Book
+
+LineResult = namedtuple("LineResult", ["book_id", "requested", "available", "ok"])
+
+
+class OutOfStockError(ValueError):
+    """Raised when at least one line can't be filled; nothing is decremented"""
+
+    def __init__(self, results):
+        self.results = results
+        short = [line for line in results if not line.ok]
+        details = ", ".join(f"book {line.book_id}: {line.available} left, {line.requested} requested" for line in short)
+        super().__init__(f"Not enough stock available ({details})")
+
+    @property
+    def shortages(self):
+        return [line for line in self.results if not line.ok]
+
+
+def _merge_lines(lines):
+    """Accept {book_id: qty} or [(book_id, qty), ...]; sum duplicate books"""
+    items = lines.items() if hasattr(lines, "items") else lines
+    merged = Counter()
+    for book_id, quantity in items:
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        merged[int(book_id)] += quantity
+    return merged
+
+
+def decrement_stock(lines, attempts=3):
+    """
+    Atomically take stock for every line, or for none of them.
+
+    Runs one conditional statement for the whole cart:
+    `UPDATE books_book SET stock = stock - CASE id ... END
+     WHERE id IN (...) AND stock >= CASE id ... END`
+    The database evaluates the guard and the write under the row lock, so
+    concurrent checkouts can never oversell or lose an update. If fewer rows
+    match than were requested, the statement is rolled back and
+    `OutOfStockError` reports which lines were short.
+    """
+    wanted = _merge_lines(lines)
+    if not wanted:
+        return []
+
+    quantity = Case(
+        *[When(id=book_id, then=Value(qty)) for book_id, qty in wanted.items()],
+        output_field=PositiveIntegerField(),
+    )
+    for _ in range(attempts):
+        try:
+            with transaction.atomic():
+                updated = (
+                    Book.objects.filter(id__in=wanted.keys(), stock__gte=quantity)
+                    .update(stock=F("stock") - quantity, updated_at=Now())
+                )
+                if updated != len(wanted):
+                    raise _PartialUpdate
+        except _PartialUpdate:
+            pass
+        else:
+            # 🔹 Stock is shown on detail pages and in the API; update() skips model signals
+            bump(BOOKS, *[book_scope(book_id) for book_id in wanted])
+            return [LineResult(book_id, qty, None, True) for book_id, qty in wanted.items()]
+
+        available = dict(Book.objects.filter(id__in=wanted.keys()).values_list("id", "stock"))
+        results = [
+            LineResult(book_id, qty, available.get(book_id, 0), available.get(book_id, 0) >= qty)
+            for book_id, qty in wanted.items()
+        ]
+        if not all(line.ok for line in results):
+            raise OutOfStockError(results)
+        # 🔹 Stock was replenished between the UPDATE and the re-read: try again
+
+    raise OutOfStockError(results)
+
+
+class _PartialUpdate(Exception):
+    """Rolls back the enclosing atomic block when a line is short"""
@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.benchmarks.asgi import run_server_comparison
+from books.benchmarks.load import seed_load_data
+
+
+class Command(BaseCommand):
+    help = "Compare catalog read throughput under WSGI and ASGI at equal concurrency as it grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, action="append",
+                            help="Virtual users (repeatable, default: 4, 16, 64)")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run")
+        parser.add_argument("--workers", type=int,
+                            help="Cap on concurrent WSGI requests (default: the concurrency level)")
+        parser.add_argument("--db-latency-ms", type=float, default=50, help="Added to every query")
+        parser.add_argument("--cache", action="store_true", help="Keep the catalog cache on")
+        parser.add_argument("--books", type=int, default=200, help="Seed the catalog up to this many books")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        levels = options["concurrency"] or [4, 16, 64]
+        seed_load_data(books=options["books"], users=max(levels), seed=options["seed"])
+        try:
+            results = run_server_comparison(
+                levels, options["duration"], options["workers"], options["db_latency_ms"],
+                cache=options["cache"], seed=options["seed"],
+            )
+        except Exception as exc:
+            raise CommandError(exc)
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,18 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from books.benchmarks.auth import SCHEMES, run_auth_benchmark
+
+
+class Command(BaseCommand):
+    help = "Compare authenticated API latency and throughput: HTTP Basic vs API tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scheme", choices=SCHEMES, action="append", help="Scheme to run (repeatable, default: all)")
+        parser.add_argument("--rounds", type=int, default=30, help="Requests per scheme")
+        parser.add_argument("--path", default="/api/orders/", help="Authenticated endpoint to request")
+
+    def handle(self, *args, **options):
+        results = run_auth_benchmark(options["rounds"], options["scheme"], options["path"])
+        self.stdout.write(json.dumps(results, indent=2))
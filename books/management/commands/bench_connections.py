@@ -0,0 +1,22 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from books.benchmarks.connections import MODES, run_connection_benchmark
+
+
+class Command(BaseCommand):
+    help = "Compare per-request connection cost: a connection per request, persistent connections, the pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=MODES, action="append", help="Mode to run (repeatable, default: all)")
+        parser.add_argument("--requests", type=int, default=400, help="Request cycles per mode")
+        parser.add_argument("--threads", type=int, default=8, help="Worker threads")
+        parser.add_argument("--pool-size", type=int, default=4, help="Pool max size (fewer than --threads makes them wait)")
+        parser.add_argument("--connect-latency-ms", type=float, default=5, help="Added to every new connection")
+
+    def handle(self, *args, **options):
+        results = run_connection_benchmark(
+            options["requests"], options["threads"], options["mode"], options["pool_size"], options["connect_latency_ms"],
+        )
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from books.benchmarks.inventory import STRATEGIES, run_inventory_stress
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = "Concurrent checkout stress test: compares stock-decrement strategies for oversell and throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strategy", choices=sorted(STRATEGIES), action="append",
+                            help="Strategy to run (repeatable, default: all)")
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--attempts", type=int, default=50, help="Checkouts per worker")
+        parser.add_argument("--stock", type=int, default=200, help="Starting stock of the scratch book")
+
+    def handle(self, *args, **options):
+        results = []
+        for strategy in options["strategy"] or ["legacy", "locked", "conditional"]:
+            # 🔹 Fresh scratch book per run so strategies don't share state
+            book = Book.objects.create(title=f"bench-inventory-{strategy}", author="bench", stock=options["stock"])
+            try:
+                results.append(run_inventory_stress(
+                    book.id, strategy, workers=options["workers"], attempts=options["attempts"],
+                ))
+            finally:
+                book.delete()
+        self.stdout.write(json.dumps(results, indent=2))
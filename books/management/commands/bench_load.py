@@ -0,0 +1,52 @@
+import json
+import os
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.benchmarks.load import DEFAULT_MIX, SERVERS, SESSIONS, run_load_test, seed_load_data
+
+
+def _mix(value):
+    """`browse=3,detail=1` -> {"browse": 3, "detail": 1}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SESSIONS:
+            raise ValueError(f"unknown session {name!r}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+class Command(BaseCommand):
+    help = "Replay concurrent browse/search/cart/checkout/API sessions against an in-process server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--server", choices=sorted(SERVERS), default="wsgi")
+        parser.add_argument("--concurrency", type=int, default=8, help="Virtual users")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+        parser.add_argument("--sessions", type=int, help="Stop each user after this many sessions")
+        parser.add_argument("--mix", type=_mix, default=DEFAULT_MIX,
+                            help=f"Session weights, e.g. browse=3,detail=1 (sessions: {', '.join(SESSIONS)})")
+        parser.add_argument("--books", type=int, default=200, help="Seed the catalog up to this many books")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for data and session choices")
+        parser.add_argument("--output", help="Results file (default: .benchmarks/load-<timestamp>.json)")
+
+    def handle(self, *args, **options):
+        seed_load_data(books=options["books"], users=options["concurrency"], seed=options["seed"])
+        try:
+            results = run_load_test(
+                concurrency=options["concurrency"], duration=options["duration"], sessions=options["sessions"],
+                mix=options["mix"], server=options["server"], seed=options["seed"],
+            )
+        except Exception as exc:
+            raise CommandError(exc)
+
+        output = options["output"] or os.path.join(
+            ".benchmarks", f"load-{datetime.now():%Y%m%d-%H%M%S}-{options['server']}.json"
+        )
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        self.stdout.write(json.dumps(results, indent=2))
+        self.stderr.write(f"Saved to {output}")
@@ -0,0 +1,25 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from books.benchmarks.serialization import VARIANTS, run_serialization_benchmark
+from books.models import Book
+from books.seeding import seed_catalog
+
+
+class Command(BaseCommand):
+    help = "Compare /api/books/ list latency: serializer vs .values() path, full vs ?fields= payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--variant", choices=[label for label, _, _ in VARIANTS], action="append",
+                            help="Variant to run (repeatable, default: all)")
+        parser.add_argument("--page-size", type=int, default=100, help="Books per page (max 100)")
+        parser.add_argument("--rounds", type=int, default=30, help="Requests per variant")
+
+    def handle(self, *args, **options):
+        missing = options["page_size"] - Book.objects.count()
+        if missing > 0:
+            seed_catalog(categories=5, books=missing, users=0, reviews=0, orders=0)
+        variants = [variant for variant in VARIANTS if not options["variant"] or variant[0] in options["variant"]]
+        results = run_serialization_benchmark(options["page_size"], options["rounds"], variants)
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from books.benchmarks.sessions import BACKENDS, run_session_benchmark, scratch_books
+
+
+class Command(BaseCommand):
+    help = "Compare cart request latency and DB writes across session/cart storage backends"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", choices=sorted(BACKENDS), action="append",
+                            help="Backend to run (repeatable, default: all)")
+        parser.add_argument("--rounds", type=int, default=20, help="Add/view/remove flows per backend")
+        parser.add_argument("--books", type=int, default=3, help="Books added per flow")
+
+    def handle(self, *args, **options):
+        books = scratch_books(options["books"])
+        try:
+            results = run_session_benchmark([book.id for book in books], options["backend"], options["rounds"])
+        finally:
+            for book in books:
+                book.delete()
+        self.stdout.write(json.dumps(results, indent=2))
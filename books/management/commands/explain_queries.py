@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books.query_plans import HOT_QUERIES, check_hot_queries
+
+
+class Command(BaseCommand):
+    help = "Print the database's plan for each hot query and flag full-table scans and sorts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", help=f"Queries to explain (default: all of {', '.join(HOT_QUERIES)})")
+        parser.add_argument("--check", action="store_true", help="Exit non-zero if any plan has a problem")
+
+    def handle(self, *args, **options):
+        unknown = set(options["queries"]) - set(HOT_QUERIES)
+        if unknown:
+            raise CommandError(f"Unknown queries: {', '.join(sorted(unknown))}")
+        failing = []
+        for name, (plan, problems) in check_hot_queries(options["queries"]).items():
+            status = self.style.ERROR("; ".join(problems)) if problems else self.style.SUCCESS("ok")
+            self.stdout.write(f"{name}: {status}\n{plan}\n")
+            if problems:
+                failing.append(name)
+        if failing and options["check"]:
+            raise CommandError(f"Plans regressed: {', '.join(failing)}")
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.exporting import EXPORTS, FORMATS, ExportFilterError, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream books, orders or order items to CSV/NDJSON in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(EXPORTS))
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--since", help="ISO date/datetime, inclusive")
+        parser.add_argument("--until", help="ISO date (whole day included) or datetime, exclusive")
+        parser.add_argument("--status", help="Order status (orders, order-items)")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per round trip")
+        parser.add_argument("-o", "--output", help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            lines = stream_export(
+                options["kind"], options["format"], chunk_size=options["chunk_size"],
+                since=options["since"], until=options["until"], status=options["status"],
+            )
+        except ExportFilterError as exc:
+            raise CommandError(exc)
+        output = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        try:
+            count = 0
+            for count, line in enumerate(lines, start=1):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if options["output"]:
+            self.stderr.write(f"Wrote {count} lines to {options['output']}")
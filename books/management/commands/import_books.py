@@ -0,0 +1,36 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from books.importing import FORMATS, detect_format, import_books
+
+
+class Command(BaseCommand):
+    help = "Upsert books (keyed on ISBN) from a CSV or JSON Lines file, in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension (csv otherwise)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per upsert statement")
+        parser.add_argument("--report", help="Also write the full JSON report to this file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(path)
+        if path == "-":
+            report = import_books(sys.stdin, fmt, options["batch_size"])
+        else:
+            with open(path, newline="", encoding="utf-8") as handle:
+                report = import_books(handle, fmt, options["batch_size"])
+
+        for error in report["errors"][:20]:
+            self.stderr.write(f"line {error['line']} ({error['isbn'] or 'no isbn'}): {error['errors']}")
+        if report["failed"] > 20:
+            self.stderr.write(f"... and {report['failed'] - 20} more rejected rows")
+        if options["report"]:
+            with open(options["report"], "w") as handle:
+                json.dump(report, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']}, updated {report['updated']}, rejected {report['failed']} rows"
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from books.profiling import PROFILE_HEADER, make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed header value that turns on profiling for a request (see books/profiling.py)"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{PROFILE_HEADER}: {make_profile_token()}")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from books.catalog_cache import invalidate_catalog
+from books.models import Book
+from books.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute Book.rating_count / rating_sum / rating_avg from reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000, help="Books per UPDATE statement")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        updated, last_id = 0, 0
+        while True:
+            # 🔹 Walk id ranges so each UPDATE holds row locks only briefly
+            ids = list(
+                Book.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += rebuild_rating_aggregates(Book.objects.filter(id__gte=ids[0], id__lte=ids[-1]))
+            last_id = ids[-1]
+        invalidate_catalog()  # 🔹 Bulk UPDATEs don't fire the signals that bump cache versions
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {updated} books"))
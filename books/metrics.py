@@ -0,0 +1,157 @@
+import threading
+from bisect import bisect_left
+
+# In-process metrics registry with Prometheus text exposition.
+#
+# Histograms are fixed-bucket counters guarded by one lock, so recording a
+# request costs a few integer increments. Values are per process: each
+# gunicorn worker exposes its own series, and Prometheus sums them.
+
+PREFIX = "bookstore"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+HISTOGRAMS = {
+    "request_duration_seconds": ("Wall time spent handling the request", DURATION_BUCKETS),
+    "view_duration_seconds": ("Time spent in the view (after URL resolution)", DURATION_BUCKETS),
+    "db_duration_seconds": ("Total SQL time per request", DURATION_BUCKETS),
+    "db_queries": ("SQL queries per request", COUNT_BUCKETS),
+    "db_duplicate_queries": ("Repeated identical SQL (same text and params) per request", COUNT_BUCKETS),
+    "response_size_bytes": ("Response body size", SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 🔹 Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_series = {}  # (metric, labels tuple) -> Histogram
+_collectors = []
+
+
+def observe(metric, value, **labels):
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _series.get(key)
+        if histogram is None:
+            histogram = _series[key] = Histogram(HISTOGRAMS[metric][1])
+        histogram.observe(value)
+
+
+def observe_request(labels, **values):
+    """Record one request's measurements (keys of `HISTOGRAMS`) under the same labels"""
+    for metric, value in values.items():
+        if value is not None:
+            observe(metric, value, **labels)
+
+
+def register_collector(collect):
+    """
+    Add a callable returning `[(name, type, help, value_or_samples), ...]` to
+    the exposition. `value_or_samples` is a number or a list of
+    `(labels_dict, number)` pairs. Used for counters kept elsewhere.
+    """
+    if collect not in _collectors:
+        _collectors.append(collect)
+
+
+def reset():
+    with _lock:
+        _series.clear()
+
+
+def snapshot():
+    """`{(metric, labels): (count, sum)}`, mainly for tests and benchmarks"""
+    with _lock:
+        return {key: (histogram.count, histogram.total) for key, histogram in _series.items()}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        series = sorted(
+            ((metric, labels, list(h.counts), h.total, h.count) for (metric, labels), h in _series.items()),
+            key=lambda row: (row[0], row[1]),
+        )
+
+    current = None
+    for metric, labels, counts, total, count in series:
+        name = f"{PREFIX}_{metric}"
+        if metric != current:
+            current = metric
+            lines.append(f"# HELP {name} {HISTOGRAMS[metric][0]}")
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, bucket_count in zip((*HISTOGRAMS[metric][1], "+Inf"), counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_format_labels((*labels, ('le', bound)))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    for collect in list(_collectors):
+        for metric, kind, help_text, value in collect():
+            name = f"{PREFIX}_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            samples = value if isinstance(value, list) else [({}, value)]
+            for labels, number in samples:
+                lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {number}")
+
+    return "\n".join(lines) + "\n"
+
+
+def app_counters():
+    """Counters kept by the cart, catalog cache, token cache and connection pools, for the exposition"""
+    from books.authentication import token_cache_stats
+    from books.cart import cart_stats
+    from books.catalog_cache import catalog_cache_stats
+    from books.db_pool import pool_stats
+
+    carts = cart_stats()
+    pools = pool_stats()
+    return [
+        ("catalog_cache_requests_total", "counter", "Catalog cache lookups by outcome",
+         [({"outcome": outcome}, count) for outcome, count in sorted(catalog_cache_stats().items())]),
+        ("api_token_auth_total", "counter", "Token authentications by outcome",
+         [({"outcome": outcome}, count) for outcome, count in sorted(token_cache_stats().items())]),
+        ("carts_total", "counter", "Carts built", carts["carts"]),
+        ("cart_storage_writes_total", "counter", "Carts that wrote to their storage", carts["session_writes"]),
+    ] + ([
+        ("db_pool_checkouts_total", "counter", "Connections taken from the pool",
+         [({"database": alias}, stats["checkouts"]) for alias, stats in pools.items()]),
+        ("db_pool_waits_total", "counter", "Checkouts that had to wait for a free connection",
+         [({"database": alias}, stats["waits"]) for alias, stats in pools.items()]),
+        ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a free connection",
+         [({"database": alias}, round(stats["wait_seconds"], 6)) for alias, stats in pools.items()]),
+        ("db_pool_timeouts_total", "counter", "Checkouts that gave up waiting",
+         [({"database": alias}, stats["timeouts"]) for alias, stats in pools.items()]),
+        ("db_pool_connections_opened_total", "counter", "Connections the pool opened (first use, or replacing a dead one)",
+         [({"database": alias}, stats["created"]) for alias, stats in pools.items()]),
+        ("db_pool_connections", "gauge", "Open pooled connections by state",
+         [({"database": alias, "state": "idle"}, stats["idle"]) for alias, stats in pools.items()]
+         + [({"database": alias, "state": "in_use"}, stats["size"] - stats["idle"]) for alias, stats in pools.items()]),
+    ] if pools else [])
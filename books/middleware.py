@@ -0,0 +1,350 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from books import db_router, metrics
+from books.profiling import RequestProfile, async_profile_lock, profile_trigger, save_profile
+from books.cart_storage import set_cart_cookie
+
+slow_query_logger = logging.getLogger("books.metrics.slow_queries")
+
+
+class _HybridMiddleware:
+    """
+    Base for middleware that runs natively under both WSGI and ASGI, so an
+    async view isn't pushed through a thread hop by a sync-only layer.
+    Subclasses dispatch to their `__acall__` when `self.is_async`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+async def _aread_file(filelike, block_size):
+    while chunk := await sync_to_async(filelike.read, thread_sensitive=False)(block_size):
+        yield chunk
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, usable under ASGI. WhiteNoise's own middleware is sync-only,
+    which makes Django run every middleware above it sync too, and the async
+    views behind a thread hop. Under ASGI this one looks static files up
+    without blocking the loop and streams them in `block_size` reads.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        response = await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        if response.file_to_stream is not None:
+            response.streaming_content = _aread_file(response.file_to_stream, response.block_size)
+        return response
+
+
+class CartCookieMiddleware(_HybridMiddleware):
+    """Persists cookie-stored carts (`CART_STORAGE = "cookie"`) on the response"""
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        set_cart_cookie(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        set_cart_cookie(request, response)
+        return response
+
+
+class PrimaryPinMiddleware(_HybridMiddleware):
+    """
+    Read-your-writes for the replica router (books/db_router.py): unsafe
+    requests and clients holding a live pin cookie read from the primary, and
+    a request that writes a catalog row sets that cookie for
+    `DB_PRIMARY_PIN_SECONDS`.
+    """
+
+    def __init__(self, get_response):
+        if not db_router.replica_databases():
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = db_router.begin_request(self._pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = db_router.end_request(token)
+        return self._finish(response, wrote)
+
+    async def __acall__(self, request):
+        token = db_router.begin_request(self._pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = db_router.end_request(token)
+        return self._finish(response, wrote)
+
+    @staticmethod
+    def _pinned(request):
+        if request.method not in ("GET", "HEAD", "OPTIONS"):
+            return True  # 🔹 Reads that feed a write must not see a stale row
+        try:
+            return float(request.COOKIES.get(db_router.PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _finish(response, wrote):
+        if wrote:
+            seconds = db_router.pin_seconds()
+            # 🔹 Unsigned on purpose: a forged pin only sends that client's reads to the primary
+            response.set_cookie(
+                db_router.PIN_COOKIE, str(int(time.time() + seconds)), max_age=seconds, httponly=True, samesite="Lax",
+            )
+        return response
+
+
+class _QueryRecorder:
+    """`execute_wrapper` that counts and times every query of one request"""
+
+    def __init__(self, request, slow_ms):
+        self.request = request
+        self.slow_ms = slow_ms
+        self.count = 0
+        self.duration = 0.0
+        self.seen = set()
+        self.duplicates = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            # 🔹 Same text *and* params twice in one request is almost always an N+1
+            key = (sql, repr(params))
+            if key in self.seen:
+                self.duplicates += 1
+            else:
+                self.seen.add(key)
+            if self.slow_ms is not None and elapsed * 1000 >= self.slow_ms:
+                slow_query_logger.warning(
+                    "Slow query (%.1f ms) in %s on %s: %s",
+                    elapsed * 1000, _view_label(self.request), context["connection"].alias, sql,
+                )
+
+
+def _wrap_connections(stack, recorder):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+
+
+def _view_label(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unresolved>"
+
+
+# 🔹 Any token is a valid method: labelling them all verbatim lets clients mint unbounded series
+_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def _method_label(request):
+    return request.method if request.method in _METHODS else "other"
+
+
+class RequestMetricsMiddleware(_HybridMiddleware):
+    """
+    Per-request SQL and timing instrumentation, keyed by resolved URL name.
+
+    Records wall time, view time, query count, SQL time, duplicate queries and
+    response size into the in-process histograms of `books.metrics` (served
+    at /metrics), and reports the timings in a `Server-Timing` header.
+    Queries are counted with `connection.execute_wrapper`, so it doesn't need
+    DEBUG and costs a few microseconds per query. Slow queries are logged
+    for a sampled fraction of requests (`METRICS_SLOW_QUERY_MS`,
+    `METRICS_SLOW_QUERY_SAMPLE_RATE`).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        if self.is_async:
+            self.process_view = self._aprocess_view  # 🔹 Django would call a sync one through a thread
+        self.server_timing = getattr(settings, "METRICS_SERVER_TIMING", True)
+        self.slow_query_ms = getattr(settings, "METRICS_SLOW_QUERY_MS", None)
+        self.slow_query_sample_rate = getattr(settings, "METRICS_SLOW_QUERY_SAMPLE_RATE", 0.0)
+
+    def _slow_query_threshold(self):
+        if self.slow_query_ms is None or random.random() >= self.slow_query_sample_rate:
+            return None
+        return self.slow_query_ms
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        recorder = _QueryRecorder(request, self._slow_query_threshold())
+        with ExitStack() as stack:
+            _wrap_connections(stack, recorder)
+            response = self.get_response(request)
+        return self._record(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        recorder = _QueryRecorder(request, self._slow_query_threshold())
+        stack = ExitStack()
+        # 🔹 Connections are per thread: wrap those of the thread the async ORM runs this request's queries on
+        await sync_to_async(_wrap_connections)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._record(request, response, recorder, start)
+
+    def _record(self, request, response, recorder, start):
+        end = time.perf_counter()
+
+        view_started = getattr(request, "_metrics_view_started", None)
+        view = end - view_started if view_started is not None else None
+        if self.server_timing:
+            timings = [
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+                f"total;dur={(end - start) * 1000:.1f}",
+            ]
+            if view is not None:
+                timings.insert(1, f"view;dur={view * 1000:.1f}")
+            response["Server-Timing"] = ", ".join(timings)
+
+        if response.streaming and getattr(response, "file_to_stream", None) is None:
+            # 🔹 A streamed body (exports) runs its queries as it is sent: keep counting until it ends
+            stream = self._arecord_stream if response.is_async else self._record_stream
+            response.streaming_content = stream(request, response.streaming_content, recorder, start, view)
+        else:
+            self._observe(request, recorder, start, view, None if response.streaming else len(response.content))
+        return response
+
+    def _observe(self, request, recorder, start, view, size):
+        metrics.observe_request(
+            {"view": _view_label(request), "method": _method_label(request)},
+            request_duration_seconds=time.perf_counter() - start,
+            view_duration_seconds=view,
+            db_duration_seconds=recorder.duration,
+            db_queries=recorder.count,
+            db_duplicate_queries=recorder.duplicates,
+            response_size_bytes=size,
+        )
+
+    def _record_stream(self, request, content, recorder, start, view):
+        size = 0
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, recorder)
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self._observe(request, recorder, start, view, size)
+
+    async def _arecord_stream(self, request, content, recorder, start, view):
+        size = 0
+        stack = ExitStack()
+        await sync_to_async(_wrap_connections)(stack, recorder)
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            await sync_to_async(stack.close)()
+            self._observe(request, recorder, start, view, size)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_started = time.perf_counter()
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_started = time.perf_counter()  # 🔹 Not self.process_view: that is this method here
+
+
+class ProfilingMiddleware(_HybridMiddleware):
+    """
+    Profiles requests that ask for it (signed `X-Profile` header, `?profile=1`
+    for staff) or are sampled, see `books.profiling`. Other requests pay one
+    header lookup and, with sampling on, one random number. Under ASGI the
+    profile covers the event-loop side of the request; ORM calls show up as
+    the awaits that hand them to the database thread. Profiles are taken one
+    at a time there, and still include other requests' coroutines that ran
+    meanwhile (see `books.profiling`).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        trigger = profile_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        with RequestProfile() as profile:
+            response = self.get_response(request)
+        return self._finish(profile, request, response, trigger)
+
+    async def __acall__(self, request):
+        if request.GET.get("profile"):
+            # 🔹 profile_trigger checks request.user.is_staff; resolve it without sync ORM calls
+            request.user = await request.auser()
+        trigger = profile_trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+        lock = async_profile_lock()
+        if trigger == "sample" and lock.locked():
+            return await self.get_response(request)  # 🔹 Sampling can skip a busy loop; asked-for profiles wait
+        async with lock:
+            with RequestProfile() as profile:
+                response = await self.get_response(request)
+        return await sync_to_async(self._finish)(profile, request, response, trigger)
+
+    def _finish(self, profile, request, response, trigger):
+        meta = save_profile(profile, request, response, trigger)
+        response["X-Profile-Id"] = meta["name"]
+        return response
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# Postgres-only: a generated, weighted tsvector over title/author/description
+# plus a trigram index for typo-tolerant title/author lookups. Other backends
+# (SQLite in tests) use the Python fallback in books/search.py instead.
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE books_book ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX books_book_search_vector_gin ON books_book USING gin (search_vector)",
+    "CREATE INDEX books_book_title_author_trgm ON books_book USING gin ((title || ' ' || author) gin_trgm_ops)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS books_book_title_author_trgm",
+    "DROP INDEX IF EXISTS books_book_search_vector_gin",
+    "ALTER TABLE books_book DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run_on_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_on_postgres(FORWARD_SQL), _run_on_postgres(REVERSE_SQL)),
+    ]
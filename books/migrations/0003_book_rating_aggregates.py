@@ -0,0 +1,41 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:18
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Book = apps.get_model('books', 'Book')
+    Review = apps.get_model('books', 'Review')
+    db_alias = schema_editor.connection.alias  # 🔹 Not the router's pick: replicas may lag or not exist yet
+    stats = Review.objects.using(db_alias).values('book').annotate(n=Count('id'), total=Sum('rating'), avg=Avg('rating'))
+    for row in stats.iterator():
+        Book.objects.using(db_alias).filter(id=row['book']).update(
+            rating_count=row['n'], rating_sum=row['total'], rating_avg=row['avg'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_book_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
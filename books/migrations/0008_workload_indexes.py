@@ -0,0 +1,57 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+# Indexes for the hot queries in books/query_plans.py. On PostgreSQL they are
+# built with CREATE INDEX CONCURRENTLY, so a large catalog keeps taking
+# orders and reviews while they build (hence `atomic = False`).
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """`AddIndex` that doesn't block writes on PostgreSQL"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, **_concurrently(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, **_concurrently(schema_editor))
+
+
+def _concurrently(schema_editor):
+    return {"concurrently": True} if schema_editor.connection.vendor == "postgresql" else {}
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('books', '0007_api_token'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='book',
+            index=models.Index(fields=['-created_at', '-id'], name='book_created_idx'),
+        ),
+        AddIndexOnline(
+            model_name='book',
+            index=models.Index(fields=['-rating_avg', '-rating_count', '-id'], name='book_rating_idx'),
+        ),
+        AddIndexOnline(
+            model_name='review',
+            index=models.Index(fields=['-created_at', '-id'], name='review_created_idx'),
+        ),
+        AddIndexOnline(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx'),
+        ),
+        AddIndexOnline(
+            model_name='user',
+            index=models.Index(fields=['email'], name='user_email_idx'),
+        ),
+    ]
@@ -1,11 +1,17 @@
 from django.contrib.auth.models import AbstractUser, Group, Permission
-from django.db import models
+from django.db import models, transaction
 
 # ✅ Custom User Model
 class User(AbstractUser):
     is_admin = models.BooleanField(default=False)
     groups = models.ManyToManyField(Group, related_name="books_users", blank=True)
     user_permissions = models.ManyToManyField(Permission, related_name="books_user_permissions", blank=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # 🔹 The duplicate-email check on every registration (CustomUserCreationForm.clean_email)
+            models.Index(fields=["email"], name="user_email_idx"),
+        ]
     
     def __str__(self):
         return self.username
@@ -14,12 +20,14 @@ class User(AbstractUser):
 class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 # ✅ Book Model
 class Book(models.Model):
+    isbn = models.CharField(max_length=13, unique=True, null=True, blank=True)  # 🔹 Natural key for bulk imports
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -28,6 +36,18 @@ class Book(models.Model):
     cover_image = models.URLField(blank=True, null=True)  
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name="books")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # 🔹 Also bumped by stock/rating update()s
+    # 🔹 Denormalized review aggregates, kept in sync by books/signals.py
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            # 🔹 Keyset pages of the catalog: newest first (the default), and ?sort=rating
+            models.Index(fields=["-created_at", "-id"], name="book_created_idx"),
+            models.Index(fields=["-rating_avg", "-rating_count", "-id"], name="book_rating_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -39,6 +59,22 @@ class Review(models.Model):
     rating = models.IntegerField(choices=[(i, i) for i in range(1, 6)])
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # 🔹 Newest-first keyset pages of a book's reviews
+            models.Index(fields=["book", "-created_at", "-id"], name="review_book_created_idx"),
+            # 🔹 The newest-first review feed across all books (ReviewViewSet's keyset pages)
+            models.Index(fields=["-created_at", "-id"], name="review_created_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember what the book's rating aggregates include, for updates"""
+        instance = super().from_db(db, field_names, values)
+        instance._counted = (instance.__dict__.get("book_id"), instance.__dict__.get("rating"))
+        return instance
 
     def __str__(self):
         return f"{self.user.username} - {self.book.title}"
@@ -59,6 +95,12 @@ class Order(models.Model):
         default="Pending"
     )
 
+    class Meta:
+        indexes = [
+            # 🔹 A user's order history, newest first (OrderViewSet's keyset pages)
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
@@ -74,9 +116,23 @@ class OrderItem(models.Model):
 
     def save(self, *args, **kwargs):
         """Reduce stock when an order item is created"""
-        if self.book.stock >= self.quantity:
-            self.book.stock -= self.quantity
-            self.book.save()
+        from books.inventory import decrement_stock
+
+        if self._state.adding:
+            # 🔹 Conditional UPDATE in the database: no read-modify-write race,
+            # raises OutOfStockError (a ValueError) if the stock isn't there
+            with transaction.atomic():
+                decrement_stock({self.book_id: self.quantity})
+                super().save(*args, **kwargs)
         else:
-            raise ValueError("Not enough stock available")
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+
+# ✅ API Token Model (issued by the API login, see books/authentication.py)
+class ApiToken(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="api_tokens")
+    digest = models.CharField(max_length=64, unique=True)  # 🔹 SHA-256 of the key; the key itself is never stored
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"API token {self.id} for {self.user.username}"
@@ -0,0 +1,52 @@
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+
+from books.inventory import decrement_stock
+from books.models import Book, Order, OrderItem
+
+OrderLine = namedtuple("OrderLine", ["book_id", "quantity", "price"], defaults=[None])
+
+
+def place_order(user, lines, **order_fields):
+    """
+    Create an order and its items in one transaction with a fixed number of
+    queries, however many lines there are:
+
+    1. one `SELECT` for the catalog prices of every book,
+    2. one conditional `UPDATE` taking all the stock (see `decrement_stock`),
+    3. one `INSERT` for the order and one `bulk_create` for its items.
+
+    `lines` are `OrderLine`s; a line without a price is charged the current
+    catalog price. `total_price` is computed unless given in `order_fields`.
+    Raises `OutOfStockError` (nothing is written) if any line is short.
+    """
+    lines = [OrderLine(*line) for line in lines]
+    if not lines:
+        raise ValueError("An order needs at least one item")
+
+    with transaction.atomic():
+        prices = dict(Book.objects.filter(id__in={line.book_id for line in lines}).values_list("id", "price"))
+        decrement_stock([(line.book_id, line.quantity) for line in lines])
+
+        items = [
+            OrderItem(
+                book_id=line.book_id,
+                quantity=line.quantity,
+                price=_money(line.price) if line.price is not None else prices[line.book_id],
+            )
+            for line in lines
+        ]
+        order_fields.setdefault("total_price", sum(item.price * item.quantity for item in items))
+        order = Order.objects.create(user=user, **order_fields)
+        for item in items:
+            item.order = order
+        # 🔹 bulk_create skips OrderItem.save, so stock is taken exactly once (above)
+        OrderItem.objects.bulk_create(items)
+
+    return order
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(Decimal("0.01"))
@@ -0,0 +1,188 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+Page = namedtuple("Page", ["items", "next_cursor", "previous_cursor"])
+
+# 🔹 Default newest-first ordering; every key is descending and `id` breaks ties
+DEFAULT_KEYSET = ("created_at", "id")
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _json_default(value):
+    # 🔹 Full microsecond isoformat (DjangoJSONEncoder truncates to ms, which breaks ties)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(keys, position, reverse=False):
+    """Opaque, URL-safe cursor for a position in the `keys` ordering"""
+    payload = {"k": list(keys), "v": list(position)}
+    if reverse:
+        payload["r"] = 1
+    raw = json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(model, keys, cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != list(keys) or len(payload["v"]) != len(keys):
+            raise ValueError("cursor was issued for a different ordering")
+        position = tuple(
+            model._meta.get_field(key).to_python(value) for key, value in zip(keys, payload["v"])
+        )
+        return position, bool(payload.get("r"))
+    except (ValueError, KeyError, TypeError, ValidationError):
+        raise InvalidCursor(cursor)
+
+
+def _key_values(item, keys):
+    # 🔹 Rows may be model instances or `.values()` dicts (see books/sparse_fields.py)
+    if isinstance(item, dict):
+        return tuple(item[key] for key in keys)
+    return tuple(getattr(item, key) for key in keys)
+
+
+class KeysetPaginator:
+    """
+    Descending keyset pagination, newest first on `(created_at, id)` by default.
+
+    Each page is a single `WHERE (keys) < cursor ORDER BY ... LIMIT n+1` query,
+    so deep pages cost the same as the first one: no OFFSET, no COUNT(*).
+    """
+
+    def __init__(self, page_size, keys=DEFAULT_KEYSET):
+        self.page_size = page_size
+        self.keys = tuple(keys)
+
+    def _after(self, position, reverse):
+        """Row-value comparison `(k1, k2, ...) < position`, spelled out for the ORM"""
+        op = "gt" if reverse else "lt"
+        # 🔹 The outer range keeps the leading index column usable; the OR breaks ties
+        condition = Q(**{f"{self.keys[0]}__{op}e": position[0]})
+        tie_breaks = Q()
+        for i, key in enumerate(self.keys):
+            equal_prefix = {k: v for k, v in zip(self.keys[:i], position[:i])}
+            tie_breaks |= Q(**equal_prefix, **{f"{key}__{op}": position[i]})
+        return condition & tie_breaks
+
+    def _window(self, queryset, cursor):
+        """`(queryset limited to one page plus one, position, reverse)` for `cursor`"""
+        position, reverse = decode_cursor(queryset.model, self.keys, cursor) if cursor else (None, False)
+
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+        if reverse:
+            queryset = queryset.order_by(*self.keys)
+        else:
+            queryset = queryset.order_by(*[f"-{key}" for key in self.keys])
+        return queryset[:self.page_size + 1], position, reverse
+
+    def _page(self, items, position, reverse):
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+        if reverse:
+            items.reverse()
+
+        if not items:
+            return Page(items, None, None)
+
+        first = _key_values(items[0], self.keys)
+        last = _key_values(items[-1], self.keys)
+        if reverse:
+            next_cursor = encode_cursor(self.keys, last)
+            previous_cursor = encode_cursor(self.keys, first, reverse=True) if has_more else None
+        else:
+            next_cursor = encode_cursor(self.keys, last) if has_more else None
+            previous_cursor = encode_cursor(self.keys, first, reverse=True) if position is not None else None
+        return Page(items, next_cursor, previous_cursor)
+
+    def paginate(self, queryset, cursor=None):
+        window, position, reverse = self._window(queryset, cursor)
+        return self._page(list(window), position, reverse)
+
+    async def apaginate(self, queryset, cursor=None):
+        """`paginate` through the async ORM"""
+        window, position, reverse = self._window(queryset, cursor)
+        return self._page([item async for item in window], position, reverse)
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination class backed by `KeysetPaginator`"""
+
+    cursor_query_param = "cursor"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def _paginator(self, request, view):
+        self.request = request
+        keys = view.get_keyset() if hasattr(view, "get_keyset") else DEFAULT_KEYSET
+        return KeysetPaginator(self.get_page_size(request), keys)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        paginator = self._paginator(request, view)
+        try:
+            self.page = paginator.paginate(queryset, request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return self.page.items
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        paginator = self._paginator(request, view)
+        try:
+            self.page = await paginator.apaginate(queryset, request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return self.page.items
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_link(self.page.next_cursor),
+            "previous": self.get_link(self.page.previous_cursor),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
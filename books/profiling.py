@@ -0,0 +1,200 @@
+import asyncio
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+# On-demand request profiling.
+#
+# A request is profiled when it carries a signed `X-Profile` header (see
+# `make_profile_token`, or `manage.py profile_token`), when a staff user adds
+# `?profile=1`, or when it falls in the `PROFILING_SAMPLE_RATE` fraction.
+# Each profile is a cProfile dump (for pstats/snakeviz) plus wall-clock stack
+# samples in collapsed format (for flamegraph.pl / speedscope), kept in a
+# bounded ring of files under `PROFILING_DIR`.
+#
+# cProfile hooks a thread, not a request. Under WSGI each request has its
+# thread to itself. Under ASGI every request shares the event loop's
+# thread, so profiles there are taken one at a time (`async_profile_lock`).
+# Even so, a profile also counts whatever other requests' coroutines ran on
+# the loop while the profiled one was waiting. For exact numbers, profile a
+# quiet worker, or use SERVER_MODE=wsgi.
+
+TOKEN_SALT = "books.profiling"
+PROFILE_HEADER = "X-Profile"
+FORMATS = {"pstats": ".pstats", "collapsed": ".collapsed"}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def profile_dir():
+    return _setting("PROFILING_DIR", os.path.join(settings.BASE_DIR, ".profiles"))
+
+
+def make_profile_token():
+    """A header value that enables profiling for `PROFILING_TOKEN_MAX_AGE` seconds"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def _valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=_setting("PROFILING_TOKEN_MAX_AGE", 3600))
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def profile_trigger(request):
+    """Why this request should be profiled ("header", "query", "sample"), or None"""
+    token = request.headers.get(PROFILE_HEADER)
+    if token and _valid_token(token):
+        return "header"
+    if request.GET.get("profile") and request.user.is_staff:
+        return "query"
+    rate = _setting("PROFILING_SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        return "sample"
+    return None
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a helper thread"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_async_locks = weakref.WeakKeyDictionary()
+
+
+def async_profile_lock():
+    """The running event loop's profiling lock: two profilers on one thread would stop each other"""
+    loop = asyncio.get_running_loop()
+    lock = _async_locks.get(loop)
+    if lock is None:
+        lock = _async_locks[loop] = asyncio.Lock()
+    return lock
+
+
+class RequestProfile:
+    """Runs cProfile and the stack sampler around one request"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(_setting("PROFILING_SAMPLE_INTERVAL", 0.005))
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.sampler.__enter__()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.sampler.__exit__(*exc_info)
+        self.duration = time.perf_counter() - self.started
+
+
+def save_profile(profile, request, response, trigger):
+    """Write a finished profile to the ring, dropping the oldest beyond `PROFILING_MAX_PROFILES`"""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    match = getattr(request, "resolver_match", None)
+    name = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    meta = {
+        "name": name,
+        "path": request.get_full_path(),
+        "method": request.method,
+        "view": match.view_name if match else None,
+        "status": response.status_code,
+        "duration_ms": round(profile.duration * 1000, 2),
+        "trigger": trigger,
+        "created_at": time.time(),
+    }
+    profile.profiler.dump_stats(os.path.join(directory, name + FORMATS["pstats"]))
+    with open(os.path.join(directory, name + FORMATS["collapsed"]), "w") as handle:
+        handle.write(profile.sampler.collapsed())
+    # 🔹 Metadata last: a profile is listed only once all its files exist
+    with open(os.path.join(directory, name + ".json"), "w") as handle:
+        json.dump(meta, handle)
+    _trim(directory, _setting("PROFILING_MAX_PROFILES", 50))
+    return meta
+
+
+def _trim(directory, keep):
+    names = sorted(entry[:-5] for entry in os.listdir(directory) if entry.endswith(".json"))
+    for name in names[:-keep] if keep else names:
+        for suffix in (".json", *FORMATS.values()):
+            try:
+                os.remove(os.path.join(directory, name + suffix))
+            except FileNotFoundError:
+                pass  # 🔹 Another worker trimmed it first
+
+
+PROFILE_ORDERS = {
+    "slowest": lambda profile: -profile.get("duration_ms", 0),
+    "newest": None,  # 🔹 Names start with a timestamp, and the directory is read newest first
+}
+
+
+def list_profiles(order="slowest"):
+    """Metadata of stored profiles, slowest first (or `order="newest"`)"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in sorted(os.listdir(directory), reverse=True):
+        if entry.endswith(".json"):
+            try:
+                with open(os.path.join(directory, entry)) as handle:
+                    profiles.append(json.load(handle))
+            except (FileNotFoundError, ValueError):
+                continue
+    if PROFILE_ORDERS[order]:
+        profiles.sort(key=PROFILE_ORDERS[order])
+    return profiles
+
+
+def profile_path(name, fmt):
+    """Path of a stored profile file, or None if `name`/`fmt` don't name one"""
+    if fmt not in FORMATS or not name.replace("-", "").isalnum():
+        return None
+    path = os.path.join(profile_dir(), name + FORMATS[fmt])
+    return path if os.path.exists(path) else None
@@ -0,0 +1,104 @@
+import re
+
+from django.db import connections
+
+from books.models import Book, Order, Review, User
+from books.pagination import DEFAULT_KEYSET, KeysetPaginator, encode_cursor
+from books.ratings import RATING_KEYSET
+
+# The hot queries, and what their plans must not contain.
+#
+# Each entry builds the queryset a view builds on a hot path: the first and a
+# deep keyset page of the book list (both orderings) and of the review feed,
+# one book's reviews, a user's order history, the registration email check.
+# The indexes in models.py exist for exactly these; `plan_problems` reads the
+# database's EXPLAIN and reports a full-table scan or a sort of the whole
+# table, which is what a dropped or mismatched index turns them into.
+# `manage.py explain_queries` prints the plans, and the tests fail on a
+# regression.
+
+PAGE_SIZE = 20
+
+
+def _deep_cursor(queryset, keys):
+    """A cursor most of the way down `queryset` in `keys` order, or None if it's empty"""
+    ordered = queryset.order_by(*[f"-{key}" for key in keys]).values_list(*keys)
+    count = ordered.count()
+    return encode_cursor(keys, ordered[count * 3 // 4]) if count else None
+
+
+def _page(queryset, keys, cursor=None):
+    return KeysetPaginator(PAGE_SIZE, keys)._window(queryset, cursor)[0]
+
+
+def sample_arguments():
+    """Ids and cursors from the current data to fill the hot queries with"""
+    book_id = Review.objects.values_list("book_id", flat=True).order_by("-book_id").first() or 0
+    user_id = Order.objects.values_list("user_id", flat=True).order_by("-user_id").first() or 0
+    return {
+        "book_id": book_id,
+        "user_id": user_id,
+        "email": User.objects.values_list("email", flat=True).order_by("-id").first() or "reader@example.com",
+        "book_cursor": _deep_cursor(Book.objects.all(), DEFAULT_KEYSET),
+        "rating_cursor": _deep_cursor(Book.objects.all(), RATING_KEYSET),
+        "review_cursor": _deep_cursor(Review.objects.all(), DEFAULT_KEYSET),
+        "book_review_cursor": _deep_cursor(Review.objects.filter(book_id=book_id), DEFAULT_KEYSET),
+        "order_cursor": _deep_cursor(Order.objects.filter(user_id=user_id), DEFAULT_KEYSET),
+    }
+
+
+HOT_QUERIES = {
+    "book_list": lambda a: _page(Book.objects.all(), DEFAULT_KEYSET),
+    "book_list_deep": lambda a: _page(Book.objects.all(), DEFAULT_KEYSET, a["book_cursor"]),
+    "book_list_by_rating": lambda a: _page(Book.objects.all(), RATING_KEYSET),
+    "book_list_by_rating_deep": lambda a: _page(Book.objects.all(), RATING_KEYSET, a["rating_cursor"]),
+    "book_reviews": lambda a: _page(Review.objects.filter(book_id=a["book_id"]).select_related("user"), DEFAULT_KEYSET),
+    "book_reviews_deep": lambda a: _page(
+        Review.objects.filter(book_id=a["book_id"]).select_related("user"), DEFAULT_KEYSET, a["book_review_cursor"],
+    ),
+    "review_feed": lambda a: _page(Review.objects.select_related("user"), DEFAULT_KEYSET),
+    "review_feed_deep": lambda a: _page(Review.objects.select_related("user"), DEFAULT_KEYSET, a["review_cursor"]),
+    "order_history": lambda a: _page(Order.objects.filter(user_id=a["user_id"]).select_related("user"), DEFAULT_KEYSET),
+    "order_history_deep": lambda a: _page(
+        Order.objects.filter(user_id=a["user_id"]).select_related("user"), DEFAULT_KEYSET, a["order_cursor"],
+    ),
+    "registration_email": lambda a: User.objects.filter(email=a["email"]).values("id")[:1],
+}
+
+# 🔹 SQLite: "SCAN books_book" reads the whole table ("SCAN ... USING INDEX" walks an index in order)
+_SQLITE_SCAN = re.compile(r"\bSCAN (\w+)\b(?! USING)")
+# 🔹 PostgreSQL: a sequential scan, or a full Sort node (an Incremental Sort rides on an index)
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+_POSTGRES_SORT = re.compile(r"(?:^|->)\s*Sort\b", re.MULTILINE)
+
+
+def explain(queryset):
+    """The database's plan for `queryset`, as text"""
+    return queryset.explain()
+
+
+def plan_problems(queryset, plan=None):
+    """What's wrong with `queryset`'s plan: full-table scans and whole-result sorts"""
+    plan = explain(queryset) if plan is None else plan
+    vendor = connections[queryset.db].vendor
+    problems = []
+    if vendor == "sqlite":
+        problems += [f"full scan of {table}" for table in _SQLITE_SCAN.findall(plan)]
+        if "USE TEMP B-TREE" in plan:
+            problems.append("sorts in a temporary b-tree")
+    elif vendor == "postgresql":
+        problems += [f"full scan of {table}" for table in _POSTGRES_SCAN.findall(plan)]
+        if _POSTGRES_SORT.search(plan):
+            problems.append("sorts the whole result")
+    return problems
+
+
+def check_hot_queries(names=None):
+    """`{name: (plan, problems)}` for the hot queries (default: all of them)"""
+    arguments = sample_arguments()
+    report = {}
+    for name in names or HOT_QUERIES:
+        queryset = HOT_QUERIES[name](arguments)
+        plan = explain(queryset)
+        report[name] = (plan, plan_problems(queryset, plan))
+    return report
@@ -0,0 +1,41 @@
+from django.db.models import Case, Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Now
+
+from books.models import Book, Review
+
+# 🔹 Listing orders for ?sort=rating (all descending, id breaks ties)
+RATING_KEYSET = ("rating_avg", "rating_count", "id")
+
+
+def apply_rating_delta(book_id, rating, sign):
+    """
+    Add (`sign=1`) or remove (`sign=-1`) one rating from a book's aggregates
+    in a single `UPDATE`. All right-hand sides see the pre-update row, so the
+    average is derived from the new sum and count, not the stale average.
+    """
+    new_sum = F("rating_sum") + sign * rating
+    new_count = F("rating_count") + sign
+    new_avg = Cast(new_sum, FloatField()) / Cast(new_count, FloatField())
+    if sign < 0:
+        # 🔹 Removing the last review must not divide by zero
+        new_avg = Case(When(rating_count__lte=1, then=Value(0.0)), default=new_avg, output_field=FloatField())
+    Book.objects.filter(id=book_id).update(
+        rating_sum=new_sum, rating_count=new_count, rating_avg=new_avg, updated_at=Now(),
+    )
+
+
+def rebuild_rating_aggregates(books=None):
+    """Recompute aggregates from `books_review` with one correlated UPDATE"""
+    if books is None:
+        books = Book.objects.all()
+    reviews = Review.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    count = Subquery(reviews.annotate(n=Count("id")).values("n"), output_field=IntegerField())
+    total = Subquery(reviews.annotate(s=Sum("rating")).values("s"), output_field=IntegerField())
+    return books.update(
+        rating_count=Coalesce(count, 0),
+        rating_sum=Coalesce(total, 0),
+        rating_avg=Coalesce(
+            Cast(total, FloatField()) / Cast(count, FloatField()), Value(0.0), output_field=FloatField()
+        ),
+        updated_at=Now(),
+    )
@@ -0,0 +1,132 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+from books.models import Book
+
+# 🔹 Trigram similarity a term needs before we treat it as a (typo'd) match
+SIMILARITY_THRESHOLD = 0.3
+# 🔹 The SQLite fallback ranks in Python, so keep the candidate set bounded
+FALLBACK_MAX_RESULTS = 200
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_query(query):
+    """Collapse whitespace and strip the raw ?q= value"""
+    return " ".join((query or "").split())
+
+
+def search_books(query, queryset=None):
+    """
+    Return `queryset` filtered to books matching `query`, annotated with
+    `search_rank` and ordered best match first.
+
+    On PostgreSQL this uses the generated `search_vector` column (GIN indexed)
+    plus a trigram index on title/author for typo tolerance. Other backends
+    (SQLite in tests) fall back to an equivalent ranking computed in Python.
+    """
+    if queryset is None:
+        queryset = Book.objects.all()
+    query = normalize_query(query)
+    if not query:
+        return queryset
+    if connection.vendor == "postgresql":
+        return _postgres_search(queryset, query)
+    return _fallback_search(queryset, query)
+
+
+def _postgres_search(queryset, query):
+    table = Book._meta.db_table
+    tsquery = "websearch_to_tsquery('english', %s)"
+    trigram_target = f"({table}.title || ' ' || {table}.author)"
+    match = RawSQL(
+        f"({table}.search_vector @@ {tsquery} OR %s <%% {trigram_target})",
+        (query, query),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"ts_rank({table}.search_vector, {tsquery}) + word_similarity(%s, {trigram_target})",
+        (query, query),
+        output_field=FloatField(),
+    )
+    return (
+        queryset.annotate(search_match=match, search_rank=rank)
+        .filter(search_match=True)
+        .order_by("-search_rank", "-id")
+    )
+
+
+def _fallback_search(queryset, query):
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+
+    scored = []
+    rows = queryset.values_list("id", "title", "author", "description")
+    for book_id, title, author, description in rows.iterator():
+        score = score_book(terms, title, author, description)
+        if score >= SIMILARITY_THRESHOLD:
+            scored.append((score, book_id))
+
+    scored.sort(key=lambda pair: (-pair[0], -pair[1]))
+    scored = scored[:FALLBACK_MAX_RESULTS]
+    if not scored:
+        return queryset.none()
+
+    rank = Case(
+        *[When(id=book_id, then=Value(score)) for score, book_id in scored],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return (
+        queryset.filter(id__in=[book_id for _, book_id in scored])
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "-id")
+    )
+
+
+def tokenize(text):
+    """Lowercase word tokens, mirroring how pg_trgm splits words"""
+    return _WORD_RE.findall((text or "").lower())
+
+
+def trigrams(word):
+    """pg_trgm-style trigram set: two leading spaces, one trailing"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    """Jaccard similarity of two words' trigram sets (same as pg_trgm)"""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    shared = len(ta & tb)
+    return shared / (len(ta) + len(tb) - shared)
+
+
+def score_book(terms, title, author, description):
+    """
+    Average per-term score: exact word hits count fully (title weighted
+    highest), otherwise the best trigram similarity against title/author words.
+    """
+    title_words = set(tokenize(title))
+    author_words = set(tokenize(author))
+    description_words = set(tokenize(description))
+    fuzzy_words = title_words | author_words
+
+    total = 0.0
+    for term in terms:
+        if term in title_words:
+            total += 1.0
+        elif term in author_words:
+            total += 0.8
+        elif term in description_words:
+            total += 0.5
+        else:
+            best = max((similarity(term, word) for word in fuzzy_words), default=0.0)
+            total += best if best >= SIMILARITY_THRESHOLD else 0.0
+    return total / len(terms)
@@ -0,0 +1,259 @@
+import csv
+import io
+import itertools
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from books.models import Book, Category, Order, OrderItem, Review, User
+from books.ratings import rebuild_rating_aggregates
+
+# Deterministic synthetic catalog for benchmarks and local development.
+#
+# The same seed and sizes always produce the same rows (on an empty
+# database). Popularity is Zipf-skewed the way real stores are: a few
+# categories and authors hold most books, a few books get most reviews and
+# order lines, and a few users write most reviews and place most orders.
+# Rows are generated and inserted batch by batch, so memory stays flat.
+
+SCALES = {
+    "tiny": {"categories": 8, "books": 60, "users": 20, "reviews": 200, "orders": 50},
+    "small": {"categories": 12, "books": 2_000, "users": 500, "reviews": 10_000, "orders": 2_000},
+    "medium": {"categories": 40, "books": 50_000, "users": 10_000, "reviews": 250_000, "orders": 50_000},
+    "large": {"categories": 100, "books": 1_000_000, "users": 200_000, "reviews": 5_000_000, "orders": 1_000_000},
+}
+
+SEED_USER_PREFIX = "reader"
+SEED_USER_PASSWORD = "reader-pass-123"
+
+GENRES = [
+    "Fiction", "Mystery", "Science Fiction", "Fantasy", "Romance", "History", "Biography", "Science",
+    "Programming", "Poetry", "Travel", "Cooking", "Children", "Philosophy", "Business", "Art",
+]
+TITLE_WORDS = [
+    "history", "python", "love", "war", "garden", "space", "music", "night", "river", "empire",
+    "shadow", "code", "winter", "secret", "ocean", "machine", "kingdom", "light", "city", "storm",
+]
+ADJECTIVES = ["Silent", "Lost", "Hidden", "Last", "Broken", "Golden", "Endless", "Little", "Wild", "Quiet"]
+FIRST_NAMES = ["Ada", "Alan", "Grace", "Mary", "Leo", "Nina", "Omar", "Priya", "Sven", "Yuki", "Zoe", "Ivan"]
+LAST_NAMES = ["Lovelace", "Turing", "Hopper", "Shelley", "Tolstoy", "Simone", "Khayyam", "Rao", "Berg", "Sato"]
+COMMENTS = ["Loved it.", "Could not put it down.", "Not for me.", "Solid read.", "Overrated.", "A classic."]
+RATINGS, RATING_WEIGHTS = (1, 2, 3, 4, 5), (5, 8, 17, 35, 35)  # 🔹 Reviews skew positive
+
+
+def zipf_cum_weights(count, exponent=1.1):
+    """Cumulative weights for `random.choices`: rank r is picked with probability ∝ 1/r^exponent"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def _timestamp_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+
+
+def _copy_insert(model, objs):
+    """PostgreSQL `COPY ... FROM STDIN`: several times faster than INSERT for rows we don't need ids back for"""
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    stamps = _timestamp_fields(model)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        row = []
+        for field in fields:
+            # 🔹 Keep the generated history: pre_save would stamp auto_now fields with the current time
+            value = getattr(obj, field.attname) if field in stamps else None
+            value = field.get_db_prep_save(value if value is not None else field.pre_save(obj, True), connection)
+            row.append(r"\N" if value is None else value)
+        writer.writerow(row)
+    buffer.seek(0)
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class CatalogSeeder:
+    """Generates and inserts one seeded catalog; see `seed_catalog`"""
+
+    def __init__(self, seed, batch_size, use_copy, log):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.use_copy = use_copy and connection.vendor == "postgresql"
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def _insert(self, model, objs, need_ids=False):
+        if self.use_copy and not need_ids:
+            _copy_insert(model, objs)
+            return objs
+        stamps = [field for field in _timestamp_fields(model) if getattr(objs[0], field.attname) is not None]
+        history = [[getattr(obj, field.attname) for field in stamps] for obj in objs]
+        objs = model.objects.bulk_create(objs, batch_size=self.batch_size)
+        if stamps:
+            # 🔹 bulk_create stamps auto_now fields with the current time; write the generated history back
+            for obj, values in zip(objs, history):
+                for field, value in zip(stamps, values):
+                    setattr(obj, field.attname, value)
+            model.objects.bulk_update(objs, [field.name for field in stamps], batch_size=self.batch_size)
+        return objs
+
+    def _past(self, max_days):
+        return self.now - timedelta(days=max_days) * self.rng.random()
+
+    def categories(self, count):
+        names = [
+            GENRES[i] if i < len(GENRES) else f"{GENRES[i % len(GENRES)]} {i // len(GENRES) + 1}"
+            for i in range(count)
+        ]
+        Category.objects.bulk_create([Category(name=name) for name in names], ignore_conflicts=True)
+        by_name = dict(Category.objects.filter(name__in=names).values_list("name", "id"))
+        return [by_name[name] for name in names]
+
+    def users(self, count):
+        password = make_password(SEED_USER_PASSWORD)  # 🔹 Hash once; PBKDF2 per row would dominate
+        start = User.objects.filter(username__startswith=SEED_USER_PREFIX).count()
+        for batch in _batched(range(start, start + count), self.batch_size):
+            User.objects.bulk_create(
+                [
+                    User(username=f"{SEED_USER_PREFIX}{i:07d}", email=f"{SEED_USER_PREFIX}{i:07d}@example.com",
+                         password=password, date_joined=self._past(1000))
+                    for i in batch
+                ],
+                ignore_conflicts=True,
+            )
+        return list(User.objects.filter(username__startswith=SEED_USER_PREFIX).order_by("id").values_list("id", flat=True))
+
+    def _book(self, index, category_ids, category_weights, authors, author_weights):
+        rng = self.rng
+        word = rng.choice(TITLE_WORDS)
+        title = rng.choice([
+            f"The {rng.choice(ADJECTIVES)} {word.title()}",
+            f"{word.title()} and {rng.choice(TITLE_WORDS).title()}",
+            f"A {rng.choice(ADJECTIVES)} {word.title()} #{index}",
+        ])
+        # 🔹 Log-normal around $15, priced at .99
+        price = Decimal(round(min(150, max(1, rng.lognormvariate(2.7, 0.5))))) - Decimal("0.01")
+        return Book(
+            title=title,
+            author=rng.choices(authors, cum_weights=author_weights)[0],
+            description=f"A {rng.choice(ADJECTIVES).lower()} book about {word} and {rng.choice(TITLE_WORDS)}.",
+            price=price,
+            stock=0 if rng.random() < 0.08 else rng.randint(1, 60),  # 🔹 Some of the catalog is sold out
+            cover_image=f"https://covers.example.com/{index}.jpg" if rng.random() < 0.7 else None,
+            category_id=rng.choices(category_ids, cum_weights=category_weights)[0],
+        )
+
+    def books(self, count, category_ids):
+        authors = [
+            f"{self.rng.choice(FIRST_NAMES)} {chr(65 + i % 26)}. {self.rng.choice(LAST_NAMES)}" for i in range(max(1, count // 8))
+        ]
+        author_weights = zipf_cum_weights(len(authors))
+        category_weights = zipf_cum_weights(len(category_ids), exponent=0.8)
+        book_ids = []
+        for batch in _batched(range(count), self.batch_size):
+            objs = [self._book(i, category_ids, category_weights, authors, author_weights) for i in batch]
+            for i, obj in zip(batch, objs):
+                # 🔹 Books arrive over three years, in id order
+                obj.created_at = obj.updated_at = self.now - timedelta(days=1095) * (1 - i / count)
+            book_ids.extend(book.id for book in self._insert(Book, objs, need_ids=True))
+            self.log(f"books: {len(book_ids)}/{count}")
+        return book_ids
+
+    def reviews(self, count, book_ids, user_ids):
+        popular = book_ids[:]
+        self.rng.shuffle(popular)  # 🔹 Bestsellers are spread across the catalog, not the oldest ids
+        book_weights = zipf_cum_weights(len(popular))
+        user_weights = zipf_cum_weights(len(user_ids), exponent=0.9)
+        bias = {}
+        done = 0
+        for batch in _batched(range(count), self.batch_size):
+            objs = []
+            for _ in batch:
+                book_id = self.rng.choices(popular, cum_weights=book_weights)[0]
+                shift = bias.setdefault(book_id, self.rng.choice((-2, -1, 0, 0, 0, 1)))
+                rating = min(5, max(1, self.rng.choices(RATINGS, RATING_WEIGHTS)[0] + shift))
+                created = self._past(730)
+                objs.append(Review(
+                    book_id=book_id,
+                    user_id=self.rng.choices(user_ids, cum_weights=user_weights)[0],
+                    rating=rating,
+                    comment=self.rng.choice(COMMENTS),
+                    created_at=created,
+                    updated_at=created,
+                ))
+            self._insert(Review, objs)
+            done += len(objs)
+            self.log(f"reviews: {done}/{count}")
+        # 🔹 Bulk inserts skip the signals that maintain the aggregates
+        for batch in _batched(sorted(bias), self.batch_size):
+            rebuild_rating_aggregates(Book.objects.filter(id__in=batch))
+
+    def orders(self, count, book_ids, user_ids):
+        popular = book_ids[:]
+        self.rng.shuffle(popular)
+        book_weights = zipf_cum_weights(len(popular))
+        user_weights = zipf_cum_weights(len(user_ids), exponent=0.9)
+        prices = {}
+        done = 0
+        for batch in _batched(range(count), self.batch_size):
+            orders, lines = [], []
+            for _ in batch:
+                picked = {
+                    self.rng.choices(popular, cum_weights=book_weights)[0]: self.rng.randint(1, 3)
+                    for _ in range(self.rng.choices((1, 2, 3, 4), (55, 25, 12, 8))[0])
+                }
+                missing = [book_id for book_id in picked if book_id not in prices]
+                if missing:
+                    prices.update(Book.objects.filter(id__in=missing).values_list("id", "price"))
+                created = self._past(730)
+                # 🔹 Only recent orders are still pending
+                pending = self.now - created < timedelta(days=14) and self.rng.random() < 0.6
+                orders.append(Order(
+                    user_id=self.rng.choices(user_ids, cum_weights=user_weights)[0],
+                    total_price=sum(prices[book_id] * quantity for book_id, quantity in picked.items()),
+                    full_name="Seed Reader", address=f"{self.rng.randint(1, 999)} Seed Street",
+                    city=self.rng.choice(["Pune", "Oslo", "Lima", "Kyoto", "Austin"]),
+                    zip_code=f"{self.rng.randint(10000, 99999)}", country="Seedland",
+                    created_at=created, status="Pending" if pending else "Completed",
+                ))
+                lines.append(picked)
+            orders = self._insert(Order, orders, need_ids=True)
+            # 🔹 Seeded history: items are inserted directly, stock is left as generated
+            self._insert(OrderItem, [
+                OrderItem(order_id=order.id, book_id=book_id, quantity=quantity, price=prices[book_id])
+                for order, picked in zip(orders, lines)
+                for book_id, quantity in picked.items()
+            ])
+            done += len(orders)
+            self.log(f"orders: {done}/{count}")
+
+
+def seed_catalog(categories, books, users, reviews, orders, seed=0, batch_size=2000, use_copy=True, log=None):
+    """
+    Insert a synthetic catalog of the given sizes (see `SCALES`) and return
+    the ids it created. Row contents depend only on `seed`. With
+    `use_copy` on PostgreSQL, reviews and order items are loaded with `COPY`.
+    """
+    seeder = CatalogSeeder(seed, batch_size, use_copy, log)
+    with transaction.atomic():
+        category_ids = seeder.categories(categories)
+        user_ids = seeder.users(users) if users else []
+    book_ids = seeder.books(books, category_ids)
+    if user_ids:
+        seeder.reviews(reviews, book_ids, user_ids)
+        seeder.orders(orders, book_ids, user_ids)
+    return {"categories": category_ids, "books": book_ids, "users": user_ids}
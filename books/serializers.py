@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Book, Category, Review, Order, OrderItem
+from .inventory import OutOfStockError
+from .orders import OrderLine, place_order
 
 User = get_user_model()  # ✅ Use the custom User model
 
@@ -36,6 +38,7 @@ class BookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = "__all__"
+        read_only_fields = ["rating_count", "rating_sum", "rating_avg"]  # 🔹 Maintained from reviews
 
 # ✅ Review Serializer (Includes user details)
 class ReviewSerializer(serializers.ModelSerializer):
@@ -65,9 +68,17 @@ class OrderSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Creates an order and associated order items"""
         items_data = validated_data.pop("items")  # Get order items
-        order = Order.objects.create(**validated_data)  # Create order
-
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)  # Create order items
-
-        return order
+        user = validated_data.pop("user")
+        lines = [
+            OrderLine(item["book"].id, item.get("quantity", 1), item.get("price"))
+            for item in items_data
+        ]
+        try:
+            return place_order(user, lines, **validated_data)  # 🔹 Shared single-transaction pipeline
+        except OutOfStockError as exc:
+            raise serializers.ValidationError({
+                "items": [
+                    f"Book {line.book_id}: only {line.available} in stock, {line.requested} requested"
+                    for line in exc.shortages
+                ]
+            })
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from books.authentication import revoke_tokens, token_cache
+from books.cart import merge_cookie_cart
+from books.catalog_cache import BOOKS, CATEGORIES, REVIEWS, book_scope, bump, category_scope
+from books.models import ApiToken, Book, Category, Review, User
+from books.ratings import apply_rating_delta, rebuild_rating_aggregates
+
+
+@receiver(post_save, sender=Review)
+def count_saved_review(sender, instance, created, **kwargs):
+    """Keep `Book.rating_*` in step with reviews added via views, API or admin"""
+    counted = getattr(instance, "_counted", None)
+    touched = {instance.book_id}
+    if not created and counted is not None:
+        old_book_id, old_rating = counted
+        touched.add(old_book_id)
+        if old_rating is None:
+            # 🔹 Loaded with the rating deferred: we can't diff, so recount
+            rebuild_rating_aggregates(Book.objects.filter(id__in=touched))
+        elif counted != (instance.book_id, instance.rating):
+            apply_rating_delta(old_book_id, old_rating, -1)
+            apply_rating_delta(instance.book_id, instance.rating, 1)
+        else:
+            # 🔹 Comment-only edit: aggregates unchanged, but the detail page did change
+            Book.objects.filter(id=instance.book_id).update(updated_at=Now())
+    elif created:
+        apply_rating_delta(instance.book_id, instance.rating, 1)
+    instance._counted = (instance.book_id, instance.rating)
+    # 🔹 Ratings show on list and detail pages; the detail page also lists reviews
+    bump(BOOKS, REVIEWS, *[book_scope(book_id) for book_id in touched if book_id])
+
+
+@receiver(post_delete, sender=Review)
+def uncount_deleted_review(sender, instance, **kwargs):
+    apply_rating_delta(instance.book_id, instance.rating, -1)
+    bump(BOOKS, REVIEWS, book_scope(instance.book_id))
+
+
+@receiver([post_save, post_delete], sender=Book)
+def invalidate_cached_book(sender, instance, **kwargs):
+    bump(BOOKS, book_scope(instance.pk))
+
+
+@receiver(pre_delete, sender=Category)
+def touch_uncategorised_books(sender, instance, **kwargs):
+    """Deleting a category nulls `Book.category` in one UPDATE that sends no Book signals: do their part"""
+    book_ids = list(Book.objects.filter(category_id=instance.pk).values_list("id", flat=True))
+    if book_ids:
+        Book.objects.filter(id__in=book_ids).update(updated_at=Now())  # 🔹 So detail ETags move too
+        bump(*[book_scope(book_id) for book_id in book_ids])
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_cached_category(sender, instance, **kwargs):
+    # 🔹 Books embed their category id; deletion also bumps each book, see touch_uncategorised_books
+    bump(CATEGORIES, category_scope(instance.pk), BOOKS)
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_password_change(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    # 🔹 set_password() leaves `_password` set until save() finishes
+    if instance._password is not None or not instance.is_active:
+        revoke_tokens(instance)
+    elif update_fields != frozenset({"last_login"}):
+        # 🔹 Cached tokens carry the user's columns (is_staff, is_superuser) as they were when verified
+        token_cache.discard_user(instance.pk)
+
+
+@receiver(post_delete, sender=ApiToken)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.discard(instance.digest)
+
+
+@receiver(user_logged_in)
+def merge_anonymous_cart(sender, request, user, **kwargs):
+    """The cookie cart an anonymous visitor built follows them into their session"""
+    if request is not None and getattr(settings, "CART_STORAGE", "session") == "cookie":
+        merge_cookie_cart(request)
@@ -0,0 +1,147 @@
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+# Sparse fieldsets for read endpoints: `?fields=id,title,price` keeps only
+# those fields, `?omit=description` drops some. The query follows: `only()`
+# defers the columns nobody asked for.
+#
+# Lists of plain model fields skip per-object serialization entirely: rows
+# come from `.values()` and each value goes through its serializer field's
+# `to_representation`, so the JSON is identical but no model instances,
+# attribute lookups or per-row serializer passes are built.
+
+SIMPLE_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.DateTimeField, serializers.DecimalField,
+    serializers.FloatField, serializers.IntegerField,
+)
+
+
+def _split(value):
+    return [name.strip() for name in value.split(",") if name.strip()] if value else []
+
+
+def _represent(row, representers):
+    item = {}
+    for name, column, represent in representers:
+        value = row[column]
+        item[name] = value if represent is None or value is None else represent(value)
+    return item
+
+
+class SparseFieldsMixin:
+    """`?fields=` / `?omit=` for a viewset's safe methods, plus the `.values()` list path"""
+
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+    values_list_path = True  # 🔹 Serve eligible lists from `.values()`
+
+    def _is_read(self):
+        request = getattr(self, "request", None)
+        return request is not None and request.method in permissions.SAFE_METHODS
+
+    def _all_fields(self):
+        if not hasattr(self, "_serializer_fields"):
+            self._serializer_fields = self.get_serializer_class()().fields
+        return self._serializer_fields
+
+    def get_requested_fields(self):
+        """Names of the serializer fields to return, or None for all of them"""
+        if not self._is_read():
+            return None
+        if not hasattr(self, "_requested_fields"):
+            params = self.request.query_params
+            wanted, omitted = _split(params.get(self.fields_query_param)), _split(params.get(self.omit_query_param))
+            available = self._all_fields()
+            unknown = sorted(set(wanted + omitted) - set(available))
+            if unknown:
+                raise ValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}"})
+            if wanted or omitted:
+                selected = [name for name in available if (not wanted or name in wanted) and name not in omitted]
+                self._requested_fields = selected
+            else:
+                self._requested_fields = None
+        return self._requested_fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        requested = self.get_requested_fields()
+        if requested is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in requested:
+                    target.fields.pop(name)
+        return serializer
+
+    def _model_columns(self, names):
+        """Model columns behind serializer fields `names`, or None if any isn't a plain column"""
+        model = self.queryset.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        fields = self._all_fields()
+        columns = []
+        for name in names:
+            source = fields[name].source
+            if source not in concrete:
+                return None
+            columns.append(source)
+        keyset = self.get_keyset() if hasattr(self, "get_keyset") else ()
+        return list(dict.fromkeys([model._meta.pk.name, *columns, *keyset]))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        requested = self.get_requested_fields()
+        if requested is not None:
+            columns = self._model_columns(requested)
+            if columns is not None:
+                queryset = queryset.only(*columns)
+        return queryset
+
+    def _value_representers(self, names):
+        """`[(name, column, to_representation)]` when every field can be rendered from a `.values()` row"""
+        fields = self._all_fields()
+        representers = []
+        for name in names:
+            field = fields[name]
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                representers.append((name, field.source, None))  # 🔹 `.values()` already yields the pk
+            elif isinstance(field, SIMPLE_FIELDS):
+                representers.append((name, field.source, field.to_representation))
+            else:
+                return None
+        return representers
+
+    def _values_plan(self):
+        """`(columns, representers)` when this list can be served from `.values()` rows, else None"""
+        names = self.get_requested_fields()
+        if names is None:
+            names = list(self._all_fields())
+        columns = self._model_columns(names) if self.values_list_path else None
+        representers = self._value_representers(names) if columns is not None else None
+        return (columns, representers) if representers is not None else None
+
+    def list(self, request, *args, **kwargs):
+        plan = self._values_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        columns, representers = plan
+        rows = self.filter_queryset(self.get_queryset()).values(*columns)
+        page = self.paginate_queryset(rows)
+        data = [_represent(row, representers) for row in (rows if page is None else page)]
+        return self.get_paginated_response(data) if page is not None else Response(data)
+
+    async def alist_data(self):
+        """The `list` payload through the async ORM, or None if only the sync `list` can build it"""
+        plan = self._values_plan()
+        if plan is None:
+            return None
+
+        columns, representers = plan
+        rows = self.filter_queryset(self.get_queryset()).values(*columns)
+        paginator = self.paginator
+        if paginator is None:
+            return [_represent(row, representers) async for row in rows]
+        if not hasattr(paginator, "apaginate_queryset"):
+            return None
+        page = await paginator.apaginate_queryset(rows, self.request, view=self)
+        return paginator.get_paginated_data([_represent(row, representers) for row in page])
@@ -1,9 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_api import async_catalog_view
 from .views import (
     UserViewSet, BookViewSet, CategoryViewSet, ReviewViewSet, OrderViewSet, OrderItemViewSet, 
-    login_view, logout_view, register_view, home_view, book_detail_view, book_list_view, 
-    cart_view, add_to_cart, remove_from_cart, clear_cart, checkout_view, order_success, add_review
+    login_view, logout_view, register_view, home_view, book_detail_view, book_list_view, book_reviews_view,
+    cart_view, add_to_cart, remove_from_cart, clear_cart, checkout_view, order_success, add_review,
+    metrics_view, profile_list_view, profile_download_view, export_view,
+    api_login_view, api_logout_view, api_register_view,
 )
 from django.contrib.auth.views import LogoutView, PasswordResetView, PasswordResetDoneView, PasswordResetConfirmView, PasswordResetCompleteView
 
@@ -26,6 +29,7 @@ urlpatterns = [
     path('books/', book_list_view, name='book_list'),
     path('books/<int:book_id>/', book_detail_view, name='book_detail'),
     path("books/<int:book_id>/review/", add_review, name="add_review"),
+    path("books/<int:book_id>/reviews/", book_reviews_view, name="book_reviews"),
 
     
     # ✅ Shopping Cart
@@ -37,16 +41,27 @@ urlpatterns = [
     # ✅ Checkout & Orders
     path('checkout/', checkout_view, name='checkout'),
     path('order-success/', order_success, name='order_success'),
+
+    # ✅ Monitoring
+    path('metrics', metrics_view, name='metrics'),
+    path('profiles/', profile_list_view, name='profile_list'),
+    path('profiles/<str:name>/<str:fmt>/', profile_download_view, name='profile_download'),
 ]
 
 # ✅ API Endpoints (DRF)
 urlpatterns += [
+    # 🔹 Async fronts for the catalog reads; they fall back to the router's views for everything else
+    path('api/books/', async_catalog_view(BookViewSet, 'book', 'list'), name='book-list'),
+    path('api/books/<int:pk>/', async_catalog_view(BookViewSet, 'book', 'detail'), name='book-detail'),
+    path('api/categories/', async_catalog_view(CategoryViewSet, 'category', 'list'), name='category-list'),
+    path('api/categories/<int:pk>/', async_catalog_view(CategoryViewSet, 'category', 'detail'), name='category-detail'),
     path('api/', include(router.urls)),  # Includes all API ViewSets
+    path('api/export/<str:kind>.<str:fmt>', export_view, name='export'),
 
     # ✅ API Authentication
-    path('api/auth/login/', login_view, name='api_login'),
-    path('api/auth/logout/', logout_view, name='api_logout'),
-    path('api/auth/register/', register_view, name='api_register'),
+    path('api/auth/login/', api_login_view, name='api_login'),
+    path('api/auth/logout/', api_logout_view, name='api_logout'),
+    path('api/auth/register/', api_register_view, name='api_register'),
 
     # ✅ Password Reset (For Web Users)
     path('password_reset/', PasswordResetView.as_view(), name='password_reset'),
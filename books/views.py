@@ -1,27 +1,53 @@
+import asyncio
+import codecs
+import os
 
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status, views
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from django.shortcuts import render, get_object_or_404, redirect
+from rest_framework.decorators import action, api_view, permission_classes
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from books.models import User
-from django.http import JsonResponse, HttpResponseRedirect
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib.admin.views.decorators import staff_member_required
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 
-from .models import User, Book, Category, Review, Order, OrderItem
+from .models import ApiToken, User, Book, Category, Review, Order, OrderItem
 from .serializers import UserSerializer, BookSerializer, CategorySerializer, ReviewSerializer, OrderSerializer, OrderItemSerializer, RegisterSerializer
 from .permissions import IsAdminUser
+from .authentication import issue_token
+from .bulk_updates import bulk_update_books
 from .cart import Cart
+from .catalog_cache import BOOKS, CATEGORIES, REVIEWS, CatalogCacheMixin, book_scope, cache_page_for_anonymous, category_scope
+from .conditional import ConditionalGetMixin, conditional_page
+from .eager_loading import EagerLoadingMixin
+from . import metrics, profiling
+from .exporting import FORMATS as EXPORT_FORMATS, ExportFilterError, astream_lines, stream_export
+from .importing import FORMATS as IMPORT_FORMATS, decode_lines, detect_format, import_books
+from .inventory import OutOfStockError
+from .orders import OrderLine, place_order
+from .search import normalize_query, search_books
+from .sparse_fields import SparseFieldsMixin
+from .pagination import DEFAULT_KEYSET, InvalidCursor, KeysetPaginator, KeysetPagination
+from .ratings import RATING_KEYSET
 from .forms import CheckoutForm, CustomUserCreationForm
 
+BOOK_LIST_PAGE_SIZE = 24
+REVIEW_PAGE_SIZE = 10
+
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
-def register_view(request):
+def api_register_view(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save()
@@ -32,38 +58,97 @@ def register_view(request):
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
-def login_view(request):
+def api_login_view(request):
     username = request.data.get("username")
     password = request.data.get("password")
 
     user = authenticate(username=username, password=password)
     if user:
         login(request, user)  # Django's session-based login
-        return Response({"message": "Login successful"}, status=status.HTTP_200_OK)
+        # 🔹 Send `Authorization: Token <key>` from now on: no password hashing per request
+        return Response({"message": "Login successful", "token": issue_token(user)}, status=status.HTTP_200_OK)
     return Response({"error": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
 
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
-def logout_view(request):
+def api_logout_view(request):
+    if isinstance(request.auth, ApiToken):
+        request.auth.delete()  # 🔹 Revokes the token this request was made with
     logout(request)  # Django's session-based logout
-    messages.success(request, "You have been logged out successfully.")
-    return redirect("home")
-
-def home_view(request):
-    return render(request, "home.html")
-
-def book_list_view(request):
-    books = Book.objects.all()
-    return render(request, "books/book_list.html", {"books": books})
-
-def book_detail_view(request, book_id):
-    """Display book details along with its reviews"""
-    book = get_object_or_404(Book, id=book_id)
-    reviews = book.reviews.all()  # ✅ Fetch all reviews related to the book
-
-    return render(request, "books/book_detail.html", {"book": book, "reviews": reviews})
+    return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
+
+async def arender(request, template_name, context=None):
+    """`render` for async views; templates read the lazy user, messages and session, which are sync-only"""
+    return await sync_to_async(render)(request, template_name, context)
+
+@cache_page_for_anonymous(lambda request: [BOOKS])
+async def home_view(request):
+    return await arender(request, "home.html")
+
+async def _book_updated_at(request, book_id):
+    return await Book.objects.filter(id=book_id).values_list("updated_at", flat=True).afirst()
+
+@conditional_page(_book_updated_at)
+@cache_page_for_anonymous(lambda request, book_id: [book_scope(book_id)])
+async def book_detail_view(request, book_id):
+    """Display book details along with the newest page of its reviews"""
+    # 🔹 Independent queries, awaited together; a missing book still 404s
+    book, page = await asyncio.gather(
+        aget_object_or_404(Book, id=book_id),
+        KeysetPaginator(REVIEW_PAGE_SIZE).apaginate(_book_reviews(book_id)),
+    )
+
+    return await arender(request, "books/book_detail.html", {
+        "book": book,
+        "reviews": page.items,
+        "next_cursor": page.next_cursor,
+    })
+
+def _book_reviews(book_id):
+    """A book's reviews, with the author's username joined in"""
+    return (
+        Review.objects.filter(book_id=book_id)
+        .select_related("user")
+        .only("id", "book_id", "rating", "comment", "created_at", "user__username")
+    )
+
+def _review_page(book_id, cursor):
+    """One keyset page of a book's reviews"""
+    return KeysetPaginator(REVIEW_PAGE_SIZE).paginate(_book_reviews(book_id), cursor)
+
+@cache_page_for_anonymous(lambda request, book_id: [book_scope(book_id)])
+def book_reviews_view(request, book_id):
+    """"Load more" reviews: an HTML fragment, or JSON with ?format=json"""
+    try:
+        page = _review_page(book_id, request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+
+    if request.GET.get("format") == "json":
+        next_url = None
+        if page.next_cursor:
+            next_url = request.build_absolute_uri(f"{request.path}?format=json&cursor={page.next_cursor}")
+        return JsonResponse({
+            "results": [
+                {
+                    "id": review.id,
+                    "username": review.user.username,
+                    "rating": review.rating,
+                    "comment": review.comment,
+                    "created_at": review.created_at,
+                }
+                for review in page.items
+            ],
+            "next": next_url,
+        })
+
+    return render(request, "books/_review_items.html", {
+        "book_id": book_id,
+        "reviews": page.items,
+        "next_cursor": page.next_cursor,
+    })
 
 @csrf_exempt
 def register_view(request):
@@ -100,14 +185,32 @@ def logout_view(request):
     return redirect("home")
 
 
-def book_list_view(request):
-    query = request.GET.get("q", "")  # Get the search query from URL
-    books = Book.objects.all()
+@cache_page_for_anonymous(lambda request: [BOOKS])
+async def book_list_view(request):
+    query = normalize_query(request.GET.get("q", ""))  # Get the search query from URL
+    sort = request.GET.get("sort", "")
+    next_cursor = previous_cursor = None
 
     if query:
-        books = books.filter(title__icontains=query)  # Case-insensitive search
-    
-    return render(request, "books/book_list.html", {"books": books, "query": query})
+        # 🔹 Ranked full-text + trigram search; the non-PostgreSQL fallback ranks in Python, off the event loop
+        matches = await sync_to_async(search_books)(query)
+        books = [book async for book in matches[:SEARCH_MAX_LIMIT]]
+    else:
+        # 🔹 Keyset pages: constant cost however deep the visitor browses
+        try:
+            keys = RATING_KEYSET if sort == "rating" else DEFAULT_KEYSET
+            page = await KeysetPaginator(BOOK_LIST_PAGE_SIZE, keys).apaginate(Book.objects.all(), request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Invalid cursor")
+        books, next_cursor, previous_cursor = page
+
+    return await arender(request, "books/book_list.html", {
+        "books": books,
+        "query": query,
+        "sort": sort,
+        "next_cursor": next_cursor,
+        "previous_cursor": previous_cursor,
+    })
 
 def cart_view(request):
     """Returns cart details as JSON."""
@@ -140,24 +243,23 @@ def checkout_view(request):
     """Handle checkout process"""
     cart = Cart(request)
 
-    if not cart.cart:  # Check if cart is empty
+    if not cart:  # Check if cart is empty
         messages.error(request, "Your cart is empty. Add items before checkout.")
         return redirect("cart_detail")
 
     if request.method == "POST":
         form = CheckoutForm(request.POST)
         if form.is_valid():
-            order = Order.objects.create(
-                user=request.user,
-                total_price=cart.get_total_price(),
-            )
-            for item in cart:
-                OrderItem.objects.create(
-                    order=order,
-                    book=Book.objects.get(id=item["book"]["id"]),  # Ensure correct book reference
-                    quantity=item["quantity"],
-                    price=item["total_price"] / item["quantity"]
+            lines = [OrderLine(*line) for line in cart.lines()]
+            try:
+                # 🔹 One transaction, constant query count regardless of cart size
+                place_order(request.user, lines, total_price=cart.get_total_price(), **form.cleaned_data)
+            except OutOfStockError as exc:
+                titles = ", ".join(
+                    Book.objects.filter(id__in=[line.book_id for line in exc.shortages]).values_list("title", flat=True)
                 )
+                messages.error(request, f"Sorry, not enough stock for: {titles}.")
+                return redirect("cart_detail")
             cart.clear()  # Empty cart after checkout
             messages.success(request, "Order placed successfully!")
             return redirect("order_success")
@@ -185,6 +287,60 @@ def add_review(request, book_id):
     return HttpResponseRedirect(request.META.get('HTTP_REFERER', '/'))
 
 
+def metrics_view(request):
+    """Prometheus exposition of this process's request metrics"""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        allowed = constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@staff_member_required
+def profile_list_view(request):
+    """Stored request profiles, slowest first (`?sort=newest` for newest first), with download links"""
+    order = request.GET.get("sort", "slowest")
+    if order not in profiling.PROFILE_ORDERS:
+        return JsonResponse({"error": f"sort must be one of: {', '.join(profiling.PROFILE_ORDERS)}"}, status=400)
+    profiles = profiling.list_profiles(order)
+    for profile in profiles:
+        profile["downloads"] = {
+            fmt: reverse("profile_download", args=[profile["name"], fmt]) for fmt in profiling.FORMATS
+        }
+    return JsonResponse({"profiles": profiles})
+
+
+@staff_member_required
+def profile_download_view(request, name, fmt):
+    """A stored profile as a pstats dump or collapsed stacks for flamegraph tools"""
+    path = profiling.profile_path(name, fmt)
+    if path is None:
+        raise Http404("No such profile")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=os.path.basename(path))
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def export_view(request, kind, fmt):
+    """
+    Stream books, orders or order items as CSV/NDJSON:
+    /api/export/orders.csv?since=2024-01-01&until=2024-03-31&status=Pending
+    """
+    params = request.query_params
+    try:
+        lines = stream_export(kind, fmt, since=params.get("since"), until=params.get("until"), status=params.get("status"))
+    except ExportFilterError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if isinstance(request._request, ASGIRequest):
+        lines = astream_lines(lines)  # 🔹 A sync iterator would be buffered whole under ASGI
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
 # User ViewSet
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -192,9 +348,11 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 # Category ViewSet
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CatalogCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_scope = conditional_scope = CATEGORIES
+    cache_item_scope = staticmethod(category_scope)
     
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
@@ -202,29 +360,116 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return [permissions.AllowAny()]  # Everyone can view categories
 
 # Book ViewSet
-class BookViewSet(viewsets.ModelViewSet):
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+class BookViewSet(ConditionalGetMixin, CatalogCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    pagination_class = KeysetPagination
+    cache_scope = conditional_scope = BOOKS
+    cache_item_scope = staticmethod(book_scope)
 
     def get_permissions(self):
         """Only allow admins to modify books"""
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "bulk_import", "bulk_update", "bulk_partial_update"]:
             return [IsAdminUser()]
         return [permissions.AllowAny()]  # Everyone can view books
 
+    def get_keyset(self):
+        """`?sort=rating` pages best-rated first, otherwise newest first"""
+        if self.request.query_params.get("sort") == "rating":
+            return RATING_KEYSET
+        return DEFAULT_KEYSET
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Ranked, typo-tolerant search: /api/books/search/?q=...&limit=20"""
+        query = normalize_query(request.query_params.get("q", ""))
+        if not query:
+            return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get("limit", SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            limit = SEARCH_DEFAULT_LIMIT
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+        books = search_books(query, self.get_queryset())[:limit]
+        serializer = self.get_serializer(books, many=True)
+        return Response({"query": query, "results": serializer.data})
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        """
+        Upsert books by ISBN from CSV or JSON Lines: /api/books/import/
+
+        Send the file as multipart field `file`, or as the raw body with a
+        `text/csv` or `application/x-ndjson` content type (its `charset` is
+        honoured, UTF-8 by default). Rows are streamed,
+        so the upload size doesn't matter; the response reports every
+        rejected row.
+        """
+        if request.content_type.startswith("multipart/form-data"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                return Response({"error": "Upload the data as the 'file' field"}, status=status.HTTP_400_BAD_REQUEST)
+            fmt, lines, charset = detect_format(upload.name), upload, upload.charset
+        else:
+            # 🔹 Raw body, read line by line; Django has split the Content-Type into media type and parameters
+            raw = request._request
+            fmt, lines, charset = detect_format(raw.content_type), raw, raw.content_params.get("charset")
+        fmt = request.query_params.get("input_format", fmt)
+        if fmt not in IMPORT_FORMATS:
+            return Response({"error": f"input_format must be one of {', '.join(IMPORT_FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            codecs.lookup(charset or "utf-8")
+        except LookupError:
+            return Response({"error": f"Unknown charset {charset!r}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(import_books(decode_lines(lines, charset), fmt))
+
+    @action(detail=False, methods=["put"], url_path="bulk")
+    def bulk_update(self, request):
+        """
+        Update many books at once: PUT /api/books/bulk/ with
+        `[{"id": 1, "title": ..., "author": ..., "category": 2, ...}, ...]`.
+        All-or-nothing; the response lists what happened to each item.
+        """
+        return self._bulk_update(request, partial=False)
+
+    @bulk_update.mapping.patch
+    def bulk_partial_update(self, request):
+        """PATCH /api/books/bulk/ with `[{"id": 1, "price": "9.99", "stock": 3}, ...]`"""
+        return self._bulk_update(request, partial=True)
+
+    def _bulk_update(self, request, partial):
+        applied, results = bulk_update_books(request.data, partial=partial)
+        return Response({"results": results}, status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST)
+
 # Review ViewSet
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(EagerLoadingMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    pagination_class = KeysetPagination
+    conditional_scope = REVIEWS
+    query_plans = {
+        "default": {"select_related": ["user"]},  # 🔹 ReviewSerializer nests UserSerializer
+    }
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 # Order ViewSet
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
+    query_plans = {
+        # 🔹 OrderSerializer nests the user and every OrderItem
+        "default": {"select_related": ["user"], "prefetch_related": ["items"]},
+    }
     
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:  # Everyone can view orders
@@ -233,7 +478,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Return orders belonging to the logged-in user"""
-        return Order.objects.filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
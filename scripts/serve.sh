@@ -0,0 +1,11 @@
+#!/bin/sh
+# Start the app server on :8000.
+# SERVER_MODE=wsgi (default): gunicorn sync workers, one request at a time each.
+# SERVER_MODE=asgi: uvicorn; async views wait on the database without holding a worker.
+# Both read WEB_CONCURRENCY for the number of worker processes.
+set -e
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    exec uvicorn book_store.asgi:application --host 0.0.0.0 --port 8000
+fi
+exec gunicorn book_store.wsgi:application --bind 0.0.0.0:8000